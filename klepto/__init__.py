@@ -24,7 +24,7 @@ except: # pragma: no cover
 
 
 from ._cache import no_cache, inf_cache, lfu_cache, \
-                    lru_cache, mru_cache, rr_cache
+                    lru_cache, mru_cache, rr_cache, clock_cache
 from ._inspect import signature, isvalid, validate, \
                       keygen, strip_markup, NULL, _keygen
 from . import rounding
@@ -14,6 +14,7 @@ import shutil
 from random import random
 from pickle import PROTO, STOP
 from collections.abc import KeysView, ValuesView, ItemsView
+from itertools import islice
 from importlib import util as imp
 if imp.find_spec('sqlalchemy'):
   sql = True
@@ -37,11 +38,13 @@ if imp.find_spec('pandas'):
 else:
   pandas = None
 import json
+import pickle
+import pickletools
 import dill
 from dill.source import getimportable
-from pox import mkdir, rmtree, walk
+from pox import mkdir, rmtree
 from ._abc import archive
-from .crypto import hash
+from .crypto import hash, _builtin
 from . import _pickle
 
 __all__ = ['cache','dict_archive','null_archive','dir_archive',\
@@ -50,8 +53,39 @@ __all__ = ['cache','dict_archive','null_archive','dir_archive',\
 
 PREFIX = "K_"  # hash needs to be importable
 TEMP = ".I_"    # indicates 'temporary' file
+# dir_archive updates with more entries write them from a thread pool (smaller
+# updates don't write enough files to pay for starting the threads)
+THREADED = 8
+# hdf arrays larger than this many bytes are stored in chunks of about this size
+CHUNKSIZE = 2**20
 #DEAD = "D_"    # indicates 'deleted' key
 
+def _pickler(object, protocol=None):
+    "get the (module, protocol) used to save the object as dill would"
+    if protocol is None: protocol = dill.settings['protocol']
+    # for protocol >= 3, dill saves basic types exactly as pickle does
+    if (protocol < 0 or protocol >= 3) and _builtin(object):
+        return pickle, protocol # the C pickler is much faster
+    # plain arrays load the same from either, and pickle avoids a data copy
+    np = sys.modules.get('numpy') # if not imported, there are no arrays
+    if np is not None and type(object) is np.ndarray \
+       and not object.dtype.hasobject:
+        return pickle, protocol
+    return dill, protocol
+
+def _dill_dump(object, file, protocol=None):
+    "dill.dump an object to a file, using the C pickler for basic types"
+    pik, protocol = _pickler(object, protocol)
+    return pik.dump(object, file, protocol=protocol)
+
+def _dill_dumps(object, protocol=None):
+    "dill.dumps an object, using the C pickler for basic types"
+    pik, protocol = _pickler(object, protocol)
+    return pik.dumps(object, protocol=protocol)
+
+def _intern(name):
+    "intern a string name, so archives with the same name share the string"
+    return sys.intern(name) if type(name) is str else name
 
 def _to_frame(archive):#, keymap=None):
     '''convert a klepto archive to a pandas DataFrame'''
@@ -88,8 +122,12 @@ def _to_frame(archive):#, keymap=None):
     return df
 
 
-def _from_frame(dataframe):#, keymap=None):
-    '''convert a (formatted) pandas dataframe to a klepto archive'''
+def _from_frame(dataframe, archive=None):#, keymap=None):
+    '''convert a (formatted) pandas dataframe to a klepto archive
+
+    If archive (a name, e.g. 'dir_archive') is given, it is used as the archive
+    type instead of the name of the dataframe's columns.
+    '''
     if not pandas:
         raise ValueError('install pandas for dataframe support')
     #if keymap is None: keymap = lambda x:x #XXX: or keymap()?
@@ -112,7 +150,7 @@ def _from_frame(dataframe):#, keymap=None):
     # get the data from the first column #XXX: apply keymap here?
     data = {} if name is None else dict((k,v) for (k,v) in d[name].items() if repr(v) not in ['nan','NaN'])
     # get the archive type, defaulting to dict_archive
-    col = df.columns.name
+    col = df.columns.name if archive is None else archive
     try:
         col = col if col.endswith('_archive') else ''.join((col,'_archive'))
     except AttributeError:
@@ -179,9 +217,11 @@ class cache(dict):
         """
         if not args:
             self.archive.update(self)
-        for arg in args:
-            if arg in self:
-                self.archive.update({arg:self.__getitem__(arg)})
+            return
+        # write the specified keys with a single update (one write for files)
+        memo = dict((arg, self.__getitem__(arg)) for arg in args if arg in self)
+        if memo:
+            self.archive.update(memo)
         return
     def archived(self, *on):
         """check if the cache is archived, or toggle archiving
@@ -238,6 +278,68 @@ class cache(dict):
     pass
 
 
+class _sized_cache(cache):
+    """dictionary augmented with an archive backend, with a bounded size"""
+    def __init__(self, *args, **kwds):
+        """initialize a size-bounded dictionary with an archive backend
+
+    Args:
+        archive (archive, default=null_archive()): instance of archive object
+        maxsize (int, default=None): maximum cache size (None is unbounded)
+
+    When maxsize is exceeded, the least-recently-used entries are dumped to
+    the archive, and then removed from the cache.
+        """
+        self.__maxsize__ = kwds.pop('maxsize', None)
+        cache.__init__(self, *args, **kwds)
+        self.__purge()
+        return
+    def __repr__(self):
+        archive = self.archive.__class__.__name__
+        name = self.archive.name
+        size = self.__maxsize__
+        if name:
+            return "%s(%r, %s, cached=True, cache_size=%r)" % (archive, str(name), dict(self), size)
+        return "%s(%s, cached=True, cache_size=%r)" % (archive, dict(self), size)
+    __repr__.__doc__ = dict.__repr__.__doc__
+    def __getitem__(self, key):
+        value = dict.pop(self, key) # move key to most-recently-used
+        dict.__setitem__(self, key, value)
+        return value
+    __getitem__.__doc__ = dict.__getitem__.__doc__
+    def __setitem__(self, key, value):
+        dict.pop(self, key, None)
+        dict.__setitem__(self, key, value)
+        self.__purge()
+    __setitem__.__doc__ = dict.__setitem__.__doc__
+    def get(self, key, value=None):
+        try: return self.__getitem__(key)
+        except KeyError: return value
+    get.__doc__ = dict.get.__doc__
+    def setdefault(self, key, value=None):
+        try: return self.__getitem__(key)
+        except KeyError: self.__setitem__(key, value)
+        return value
+    setdefault.__doc__ = dict.setdefault.__doc__
+    def update(self, *args, **kwds):
+        dict.update(self, *args, **kwds)
+        self.__purge()
+    update.__doc__ = dict.update.__doc__
+    def __purge(self):
+        "dump and remove least-recently-used entries, while above maxsize"
+        # unpickling sets the items before the state, so maxsize may be unset
+        maxsize = getattr(self, '__maxsize__', None)
+        if maxsize is None: return
+        excess = len(self) - maxsize
+        if excess <= 0: return
+        keys = list(islice(iter(self), excess))
+        if self.archived(): self.dump(*keys) # a single write to the archive
+        for key in keys:
+            dict.__delitem__(self, key)
+        return
+    pass
+
+
 class dict_archive(archive):
     """dictionary with an archive interface"""
     def __init__(self, *args, **kwds):
@@ -346,7 +448,7 @@ class dir_archive(archive):
             'memmode': kwds.get('memmode', None),
             'memsize': kwds.get('memsize', 100), # unused?
             'protocol': kwds.get('protocol', None),
-            'id': dirname
+            'id': _intern(dirname)
         } #XXX: add 'cloud' option?
         # if not serialized, then set fast=False
         if not serialized:
@@ -498,6 +600,15 @@ class dir_archive(archive):
         if hasattr(adict,'__asdict__'): adict = adict.__asdict__()
         memo = {}
         memo.update(adict, **kwds) #XXX: could be better ?
+        if len(memo) > THREADED and len(set(map(self._fname, memo))) == len(memo):
+            # file writes release the GIL, so write many entries in parallel
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(32, len(memo))) as pool:
+                writes = [pool.submit(self.__setitem__, key, val) \
+                          for (key,val) in memo.items()]
+            for write in writes: # raise the first error, as the loop would
+                write.result()
+            return
         for (key,val) in memo.items():
             self.__setitem__(key,val)
         return
@@ -518,10 +629,18 @@ class dir_archive(archive):
     def _mkdir(self, key):
         "create results subdirectory corresponding to given key"
         key = self._fname(key)
-        try:
-            return mkdir(PREFIX+key, root=self.__state__['id'], mode=self.__state__['permissions'])
-        except OSError: # then directory already exists
-            return self._getdir(key)
+        path = os.path.join(self.__state__['id'], PREFIX+key)
+        mode = self.__state__['permissions']
+        try: # the root usually exists, so a single mkdir will do
+            os.mkdir(path, 0o775 if mode is None else mode)
+        except FileExistsError:
+            pass
+        except FileNotFoundError: # build the missing parents, as 'mkdir -p'
+            try:
+                return mkdir(PREFIX+key, root=self.__state__['id'], mode=mode)
+            except OSError: # then directory already exists
+                pass
+        return path
 
     def _getdir(self, key):
         "get results directory name corresponding to given key"
@@ -530,14 +649,30 @@ class dir_archive(archive):
 
     def _rmdir(self, key):
         "remove results subdirectory corresponding to given key"
-        rmtree(self._getdir(key), self=True, ignore_errors=True)
+        path = self._getdir(key)
+        try: # the subdirectory usually only holds files, so unlink them
+            for name in os.listdir(path):
+                os.unlink(os.path.join(path, name))
+            os.rmdir(path)
+        except FileNotFoundError: # no subdirectory for the key
+            pass
+        except OSError: # holds a directory (e.g. __pycache__)
+            rmtree(path, self=True, ignore_errors=True)
         return
     def _lsdir(self):
         "get a list of subdirectories in the root directory"
-        return walk(self.__state__['id'],patterns=PREFIX+'*',recurse=False,folders=True,files=False,links=False)
+        # scandir gets the entry types with the listing, so no stat calls
+        try:
+            with os.scandir(self.__state__['id']) as entries:
+                return [os.path.normpath(entry.path) for entry in entries \
+                        if entry.name.startswith(PREFIX) \
+                        and entry.is_dir(follow_symlinks=False)]
+        except OSError: # root is missing
+            return []
     def _hasinput(self, root):
         "check if results subdirectory has stored input file"
-        return bool(walk(root,patterns=self._args,recurse=False,folders=False,files=True,links=False))
+        _file = os.path.join(root, self._args)
+        return os.path.isfile(_file) and not os.path.islink(_file)
     def _getkey(self, root):
         "get key given a results subdirectory name"
         key = os.path.basename(root)[2:]
@@ -622,11 +757,12 @@ class dir_archive(archive):
                         pik,mode,kwd = json,'w',{}
                     else: #XXX: byref?
                         pik,mode,kwd = dill,'wb',{'protocol':protocol}
+                    dump = _dill_dump if pik is dill else pik.dump
                     with open(_file, mode) as f:
-                        pik.dump(value, f, **kwd)
+                        dump(value, f, **kwd)
                     if input:
                         with open(_args, mode) as f:
-                            pik.dump(key, f, **kwd)
+                            dump(key, f, **kwd)
             else: # try to get an import for the object
                 try: memo = getimportable(value, alias='memo', byname=False)
                 except AttributeError: #XXX: HACKY... get classes by name
@@ -700,7 +836,7 @@ class file_archive(archive):
         elif not serialized and not filename.endswith(('.py','.pyc','.pyo','.pyd')): filename = filename+'.py'
         # set state
         self.__state__ = {
-            'id': filename,
+            'id': _intern(filename),
             'serialized': serialized,
             'protocol': protocol
         } #XXX: add 'cloud' option?
@@ -747,8 +883,11 @@ class file_archive(archive):
             finally:
                 os.chdir(curdir)
         return memo
-    def __save__(self, memo=None):
-        """create an archive from the given dictionary"""
+    def __save__(self, memo=None, optimize=False):
+        """create an archive from the given dictionary
+
+    If optimize is True, strip unused memo entries from large pickles.
+        """
         if memo == None: return
         filename = self.__state__['id']
         _filename = os.path.join(os.path.dirname(os.path.abspath(filename)), TEMP+hash(random(), 'md5'))
@@ -757,11 +896,17 @@ class file_archive(archive):
             if self.__state__['serialized']:
                 protocol = self.__state__['protocol']
                 if type(protocol) is str: #XXX: assumes 'json'
-                    pik,mode,kwd = json,'w',{}
+                    with open(_filename, 'w') as f:
+                        json.dump(memo, f)
+                elif optimize: # drop unused memo, so large pickles load faster
+                    memo = _dill_dumps(memo, protocol=protocol)
+                    if len(memo) > 2**16:
+                        memo = pickletools.optimize(memo)
+                    with open(_filename, 'wb') as f:
+                        f.write(memo)
                 else: #XXX: byref=True ?
-                    pik,mode,kwd = dill,'wb',{'protocol':protocol}
-                with open(_filename, mode) as f:
-                    pik.dump(memo, f, **kwd)
+                    with open(_filename, 'wb') as f:
+                        _dill_dump(memo, f, protocol=protocol)
             else: #XXX: likely_import for each item in dict... ?
                 from .tools import _b
                 open(_filename, 'wb').write(_b('memo = %s' % repr(memo)))
@@ -879,6 +1024,8 @@ class file_archive(archive):
     setdefault.__doc__ = dict.setdefault.__doc__
     def update(self, adict, **kwds):
         if hasattr(adict,'__asdict__'): adict = adict.__asdict__()
+        if not kwds and isinstance(adict, dict) and not adict: # nothing to write
+            return
         memo = self.__asdict__()
         memo.update(adict, **kwds)
         self.__save__(memo)
@@ -910,6 +1057,39 @@ def _sqlname(name):
     return (db, table)
 
 
+def _pooled(kwds):
+    """add connection pool defaults to the keywords for create_engine
+
+    kwds: dict of keywords for sqlalchemy.create_engine
+
+    The most recent connection is reused, and is checked before use. The
+    defaults only apply to the default pool, as other pool classes reject them.
+    """
+    if 'poolclass' not in kwds and 'pool' not in kwds:
+        kwds.setdefault('pool_use_lifo', True)
+        kwds.setdefault('pool_pre_ping', True)
+    return kwds
+
+
+def _chunks(shape, itemsize, nbytes=CHUNKSIZE):
+    """get a chunk shape, of roughly nbytes, for an array of the given shape
+
+    shape: tuple of the array dimensions
+    itemsize: size (in bytes) of a single array element
+    nbytes: target size (in bytes) of a chunk [default: 1 MB]
+    """
+    chunks = [max(1, int(i)) for i in shape]
+    size = itemsize
+    for i in chunks: size *= i
+    # halve the largest dimension until the chunk fits within nbytes
+    while size > nbytes and max(chunks) > 1:
+        i = chunks.index(max(chunks))
+        size = size // chunks[i]
+        chunks[i] = (chunks[i] + 1) // 2
+        size = size * chunks[i]
+    return tuple(chunks)
+
+
 if sql:
   #FIXME: serialized throws RecursionError... but r'\x80' is valid (so is '80')
   #       however, '\x80' and u'\x80' and b'\x80' are not valid (also not 80)
@@ -982,7 +1162,7 @@ if sql:
                   self._conn.commit()
               except Exception:
                   pass
-              self._engine = sql.create_engine(_database, **kwds)
+              self._engine = sql.create_engine(_database, **_pooled(kwds))
           self._conn = self._engine.connect()
           # table internals
           self._metadata = sql.MetaData()
@@ -1280,7 +1460,7 @@ if sql:
                   self._conn.commit()
               except Exception:
                   pass
-              self._engine = sql.create_engine(_database, **kwds)
+              self._engine = sql.create_engine(_database, **_pooled(kwds))
           self._conn = self._engine.connect()
           # prepare to create table
           self._metadata = sql.MetaData()
@@ -1303,6 +1483,12 @@ if sql:
               )
           self._key = table.c[self._key]
           self.__state__['id'] = table
+          # prepare statements once; the key is bound at execution
+          _key = sql.bindparam('_key_')
+          self._select = sql.select(table).where(self._key == _key)
+          self._exists = sql.select(self._key).where(self._key == _key)
+          self._update = table.update().where(self._key == _key)
+          self._delete = sql.delete(table).where(self._key == _key)
           # initialize
           self._metadata.create_all(self._engine)
           return
@@ -1346,21 +1532,20 @@ if sql:
           session = orm.sessionmaker(bind=self._engine, future=True)() # 1.4 & 2.0
           return int(session.query(self.__state__['id']).count())
       def __contains__(self, key):
-          query = sql.select(self._key).where(self._key == key)
-          row = self._conn.execute(query).fetchone()
+          row = self._conn.execute(self._exists, {'_key_': key}).fetchone()
           return row is not None
       __contains__.__doc__ = dict.__contains__.__doc__
       def __setitem__(self, key, value):
           value = {self._val: value} #XXX: force into single item dict...?
           table = self.__state__['id']
           if key in self:
-              values = value
-              query = table.update().where(self._key == key)
+              values = {'_key_': key}
+              values.update(value)
+              self._conn.execute(self._update, values)
           else:
               values = {self._key.name: key}
               values.update(value)
-              query = table.insert()
-          self._conn.execute(query.values(**values))
+              self._conn.execute(table.insert().values(**values))
           self._conn.commit()
           return
       __setitem__.__doc__ = dict.__setitem__.__doc__
@@ -1391,8 +1576,7 @@ if sql:
           return
       __delitem__.__doc__ = dict.__delitem__.__doc__
       def __getitem__(self, key):
-          query = sql.select(self.__state__['id']).where(self._key == key)
-          row = self._conn.execute(query).fetchone()
+          row = self._conn.execute(self._select, {'_key_': key}).fetchone()
           if row is None: raise KeyError(key)
           return row._mapping[self._val]
       __getitem__.__doc__ = dict.__getitem__.__doc__
@@ -1403,8 +1587,7 @@ if sql:
               yield row[0]
       __iter__.__doc__ = dict.__iter__.__doc__
       def get(self, key, value=None):
-          query = sql.select(self.__state__['id']).where(self._key == key)
-          row = self._conn.execute(query).fetchone()
+          row = self._conn.execute(self._select, {'_key_': key}).fetchone()
           if row != None:
               _value = row._mapping[self._val]
           else: _value = value
@@ -1462,15 +1645,13 @@ if sql:
           L = len(value)
           if L > 1:
               raise TypeError("pop expected at most 2 arguments, got %s" % str(L+1))
-          query = sql.select(self.__state__['id']).where(self._key == key)
-          row = self._conn.execute(query).fetchone()
+          row = self._conn.execute(self._select, {'_key_': key}).fetchone()
           if row != None:
               _value = row._mapping[self._val]
           else:
               if not L: raise KeyError(key)
               _value = value[0]
-          query = sql.delete(self.__state__['id']).where(self._key == key)
-          self._conn.execute(query)
+          self._conn.execute(self._delete, {'_key_': key})
           self._conn.commit()
           return _value
       pop.__doc__ = dict.pop.__doc__
@@ -1484,8 +1665,7 @@ if sql:
           L = len(value)
           if L > 1:
               raise TypeError("setvalue expected at most 2 arguments, got %s" % str(L+1))
-          query = sql.select(self.__state__['id']).where(self._key == key)
-          row = self._conn.execute(query).fetchone()
+          row = self._conn.execute(self._select, {'_key_': key}).fetchone()
           if row != None:
               _value = row._mapping[self._val]
           else:
@@ -1499,8 +1679,17 @@ if sql:
           elif hasattr(adict, 'copy'): adict = adict.copy()
           else: adict = dict(adict)
           adict.update(**kwds)
-          [self.__setitem__(k,v) for (k,v) in adict.items()]
-          return #XXX: should do the above all at once, and more efficiently
+          if not adict: return
+          # write all the rows in a single transaction
+          table = self.__state__['id']
+          old, new = [], []
+          for (k,v) in adict.items():
+              if k in self: old.append({'_key_': k, self._val: v})
+              else: new.append({self._key.name: k, self._val: v})
+          if old: self._conn.execute(self._update, old)
+          if new: self._conn.execute(table.insert(), new)
+          self._conn.commit()
+          return
       update.__doc__ = dict.update.__doc__
       # interface
       def __get_name(self):
@@ -1726,7 +1915,11 @@ else:
           elif hasattr(adict, 'copy'): adict = adict.copy()
           else: adict = dict(adict)
           adict.update(**kwds)
-          [self.__setitem__(k,v) for (k,v) in adict.items()]
+          if not adict: return
+          # write all the rows in a single transaction
+          sql = "insert into %s values(?,?)" % self.__state__['id']
+          self._engine.executemany(sql, adict.items())
+          self._conn.commit()
           return
       update.__doc__ = dict.update.__doc__
       def _select_key_items(self, key):
@@ -1759,6 +1952,8 @@ if hdf:
           serialized (bool, default=True): pickle saved python objects
           protocol (int, default=DEFAULT_PROTOCOL): pickling protocol
           meta (bool, default=False): store in root metadata (not in dataset)
+          chunks (bool, default=True): store unserialized arrays over 1 MB in chunks
+          compression (str, default=None): filter for chunked arrays (e.g. 'lzf')
           """
           #FIXME: (needs doc) if protocol='json', use the json serializer
           __import_hdf__()
@@ -1767,10 +1962,12 @@ if hdf:
           # set state
           meta = kwds.get('meta', False)
           self.__state__ = {
-              'id': filename,
+              'id': _intern(filename),
               'serialized': serialized,
               'protocol': kwds.get('protocol', 0 if meta else None),
-              'meta': meta
+              'meta': meta,
+              'chunks': kwds.get('chunks', True),
+              'compression': kwds.get('compression', None)
           } #XXX: add 'cloud' option?
           if not os.path.exists(filename):
               self.__save__({})
@@ -1809,6 +2006,37 @@ if hdf:
                   value = void(dill.dumps(value, protocol=protocol))
               return value if self.__state__['meta'] else [value]
           return value #XXX: or [value]? (so no scalars)
+      def _dumpitem(self, file, key, value): # store an item in the archive
+          'store a (converted) key and value in the HDF file'
+          _f = self._attrs(file)
+          _f.pop(key, None)
+          value = self._dumpval(value)
+          chunks = self.__state__.get('chunks', True)
+          shape = getattr(value, 'shape', ())
+          dtype = getattr(value, 'dtype', None)
+          # pickles and scalars are stored contiguously (i.e. not chunked)
+          if self.__state__['meta'] or not chunks or not shape \
+             or not all(shape) or dtype is None or dtype.hasobject:
+              _f[key] = value
+              return
+          # lzf (or a hdf5plugin filter) decompresses without holding the GIL,
+          # but is opt-in, as not every HDF5 reader can decompress it
+          compression = self.__state__.get('compression', None)
+          # arrays within a single chunk are stored contiguously (unless
+          # compressed, as filters require chunked storage)
+          if chunks is True and not compression and value.nbytes <= CHUNKSIZE:
+              _f[key] = value
+              return
+          if chunks is True: # get a chunk shape of roughly 1 MB
+              chunks = _chunks(shape, dtype.itemsize)
+          if not compression:
+              filters = {}
+          elif isinstance(compression, dict): # e.g. hdf5plugin.Blosc()
+              filters = compression
+          else:
+              filters = {'compression': compression, 'shuffle': True}
+          file.create_dataset(key, data=value, chunks=chunks, **filters)
+          return
       def __asdict__(self):
           """build a dictionary containing the archive contents"""
           filename = self.__state__['id']
@@ -1839,10 +2067,7 @@ if hdf:
               f = hdf.File(_filename, 'w' if new else 'a')
               for k,v in memo.items():
                  #self._attrs(f).update({self._dumpkey(k): self._dumpval(v)})
-                  _f = self._attrs(f)
-                  _k = self._dumpkey(k)
-                  _f.pop(_k,None)
-                  _f[_k] = self._dumpval(v)
+                  self._dumpitem(f, self._dumpkey(k), v)
           except OSError:
               "failed to populate file for %s" % str(filename)
           finally:
@@ -1903,10 +2128,7 @@ if hdf:
           try:
               f = hdf.File(filename, 'a')
              #self._attrs(f).update({self._dumpkey(key): self._dumpval(value)})
-              _f = self._attrs(f)
-              _k = self._dumpkey(key)
-              _f.pop(_k,None)
-              _f[_k] = self._dumpval(value)
+              self._dumpitem(f, self._dumpkey(key), value)
           except KeyError: #XXX: should only catch appropriate exceptions
               raise KeyError(key)
              #raise OSError("error reading file archive %s" % filename)
@@ -2051,6 +2273,8 @@ if hdf:
           permissions (octal, default=0o775): read/write permission indicator
           protocol (int, default=DEFAULT_PROTOCOL): pickling protocol
           meta (bool, default=False): store in root metadata (not in dataset)
+          chunks (bool, default=True): store unserialized arrays over 1 MB in chunks
+          compression (str, default=None): filter for chunked arrays (e.g. 'lzf')
           """
           #FIXME: (needs doc) if protocol='json', use the json serializer
           __import_hdf__()
@@ -2059,11 +2283,13 @@ if hdf:
           # set state
           meta = kwds.get('meta', False)
           self.__state__ = {
-              'id': dirname,
+              'id': _intern(dirname),
               'serialized': serialized,
               'permissions': kwds.get('permissions', None),
               'protocol': kwds.get('protocol', 0 if meta else None),
-              'meta': meta
+              'meta': meta,
+              'chunks': kwds.get('chunks', True),
+              'compression': kwds.get('compression', None)
           } #XXX: add 'cloud' option?
           try:
               self.__state__['id'] = mkdir(dirname, mode=self.__state__['permissions'])
@@ -2215,24 +2441,48 @@ if hdf:
       def _mkdir(self, key):
           "create results subdirectory corresponding to given key"
           key = self._fname(key)
-          try:
-              return mkdir(PREFIX+key, root=self.__state__['id'], mode=self.__state__['permissions'])
-          except OSError: # then directory already exists
-              return self._getdir(key)
+          path = os.path.join(self.__state__['id'], PREFIX+key)
+          mode = self.__state__['permissions']
+          try: # the root usually exists, so a single mkdir will do
+              os.mkdir(path, 0o775 if mode is None else mode)
+          except FileExistsError:
+              pass
+          except FileNotFoundError: # build the missing parents, as 'mkdir -p'
+              try:
+                  return mkdir(PREFIX+key, root=self.__state__['id'], mode=mode)
+              except OSError: # then directory already exists
+                  pass
+          return path
       def _getdir(self, key):
           "get results directory name corresponding to given key"
           key = self._fname(key)
           return os.path.join(self.__state__['id'], PREFIX+key)
       def _rmdir(self, key):
           "remove results subdirectory corresponding to given key"
-          rmtree(self._getdir(key), self=True, ignore_errors=True)
+          path = self._getdir(key)
+          try: # the subdirectory usually only holds files, so unlink them
+              for name in os.listdir(path):
+                  os.unlink(os.path.join(path, name))
+              os.rmdir(path)
+          except FileNotFoundError: # no subdirectory for the key
+              pass
+          except OSError: # holds a directory (e.g. __pycache__)
+              rmtree(path, self=True, ignore_errors=True)
           return
       def _lsdir(self):
           "get a list of subdirectories in the root directory"
-          return walk(self.__state__['id'],patterns=PREFIX+'*',recurse=False,folders=True,files=False,links=False)
+          # scandir gets the entry types with the listing, so no stat calls
+          try:
+              with os.scandir(self.__state__['id']) as entries:
+                  return [os.path.normpath(entry.path) for entry in entries \
+                          if entry.name.startswith(PREFIX) \
+                          and entry.is_dir(follow_symlinks=False)]
+          except OSError: # root is missing
+              return []
       def _hasinput(self, root):
           "check if results subdirectory has stored input file"
-          return bool(walk(root,patterns=self._args,recurse=False,folders=False,files=True,links=False))
+          _file = os.path.join(root, self._args)
+          return os.path.isfile(_file) and not os.path.islink(_file)
       def _getkey(self, root):
           "get key given a results subdirectory name"
           key = os.path.basename(root)[2:]
@@ -2265,7 +2515,9 @@ if hdf:
           try:
               adict = {'serialized':self.__state__['serialized'],\
                        'protocol':self.__state__['protocol'],\
-                       'meta':self.__state__['meta'], 'cached':False}
+                       'meta':self.__state__['meta'], 'cached':False,\
+                       'chunks':self.__state__.get('chunks', True),\
+                       'compression':self.__state__.get('compression', None)}
               #XXX: assumes one entry per file; ...could use name as key?
               #XXX: alternately, could store {key:value} (i.e. use one file)?
               memo = tuple(hdf_archive(_file, **adict).__asdict__().values())[0]
@@ -2289,7 +2541,9 @@ if hdf:
               if input: _args = os.path.join(self._getdir(_key), self._args)
               adict = {'serialized':self.__state__['serialized'],\
                        'protocol':self.__state__['protocol'],\
-                       'meta':self.__state__['meta']}
+                       'meta':self.__state__['meta'],\
+                       'chunks':self.__state__.get('chunks', True),\
+                       'compression':self.__state__.get('compression', None)}
               #XXX: assumes one entry per file; ...could use name as key?
               memo = hdf_archive(_file, **adict)
               memo[None] = value
@@ -13,6 +13,7 @@
 a selection of caching decorators
 """
 from functools import update_wrapper, partial
+from random import randrange
 from klepto.archives import cache as archive_dict
 from klepto.keymaps import hashmap
 from klepto.tools import CacheInfo
@@ -20,12 +21,7 @@ from klepto.rounding import deep_round, simple_round
 from ._inspect import _keygen
 
 __all__ = ['no_cache','inf_cache','lfu_cache',\
-           'lru_cache','mru_cache','rr_cache']
-
-class Counter(dict):
-    'Mapping where default values are zero'
-    def __missing__(self, key):
-        return 0
+           'lru_cache','mru_cache','rr_cache','clock_cache']
 
 #XXX: what about caches that expire due to time, calls, etc...
 #XXX: check the impact of not serializing by default, and hashmap by default
@@ -483,10 +479,10 @@ class lfu_cache(object):
         return
 
     def __call__(self, user_function):
-        from heapq import nsmallest
-        from operator import itemgetter
        #cache = dict()                  # mapping of args to results
-        use_count = Counter()           # times each key has been accessed
+        use_count = {}                  # times each key has been accessed
+        buckets = {}                    # keys with each count, oldest first
+        lowest = [0]                    # least count, updateable non-locally
         stats = [0, 0, 0]               # make statistics updateable non-locally
         HIT, MISS, LOAD = 0, 1, 2       # names for the stats fields
         _len = len                      # localize the global len() function
@@ -498,6 +494,31 @@ class lfu_cache(object):
         rounded_args = self.__state__['roundargs']
         purge = self.__state__['purge']
 
+        def touch(key):
+            """Increment the use count of the key, in O(1)"""
+            count = use_count.get(key, 0)
+            if count:
+                bucket = buckets[count]
+                del bucket[key]
+                if not bucket:
+                    del buckets[count]
+                    if lowest[0] == count: lowest[0] = count + 1
+            else: lowest[0] = 1
+            use_count[key] = count + 1
+            buckets.setdefault(count + 1, {})[key] = None
+
+        def evict():
+            """Pop the least frequently used key (the oldest, for ties)"""
+            count = lowest[0]
+            bucket = buckets[count]
+            key = next(iter(bucket))
+            del bucket[key]
+            del use_count[key]
+            if not bucket:
+                del buckets[count]
+                lowest[0] = min(buckets) if buckets else 0
+            return key
+
         def wrapper(*args, **kwds):
             _args, _kwds = rounded_args(*args, **kwds)
             _args, _kwds = _keygen(user_function, ignore, *_args, **_kwds)
@@ -506,7 +527,7 @@ class lfu_cache(object):
             try:
                 # get cache entry
                 result = cache[key]
-                use_count[key] += 1
+                touch(key)
                 stats[HIT] += 1
             except KeyError:
                 # if not in cache, look in archive
@@ -514,13 +535,13 @@ class lfu_cache(object):
                     cache.load(key)
                 try:
                     result = cache[key]
-                    use_count[key] += 1
+                    touch(key)
                     stats[LOAD] += 1
                 except KeyError:
                     # if not found, then compute
                     result = user_function(*args, **kwds)
                     cache[key] = result
-                    use_count[key] += 1
+                    touch(key)
                     stats[MISS] += 1
 
                 # purge cache
@@ -530,14 +551,14 @@ class lfu_cache(object):
                         cache.dump()
                         cache.clear() 
                         use_count.clear()
+                        buckets.clear()
                     else: # purge least frequent cache entries
-                        for k, _ in nsmallest(max(2, maxsize // 10),
-                                              iter(use_count.items()),
-                                              key=itemgetter(1)):
+                        for _ in range(max(2, maxsize // 10)):
+                            if not use_count: break
+                            k = evict()
                             if cache.archived(): cache.dump(k)
                             try: del cache[k]
                             except KeyError: pass #FIXME: possible less purged
-                            use_count.pop(k, None)
             return result
 
         def archive(obj):
@@ -573,6 +594,7 @@ class lfu_cache(object):
             """Clear the cache and statistics"""
             cache.clear()
             use_count.clear()
+            buckets.clear()
             if not keepstats: stats[:] = [0, 0, 0]
 
         def info():
@@ -703,12 +725,8 @@ class lru_cache(object):
         return
 
     def __call__(self, user_function):
-        from collections import deque
-        from itertools import filterfalse
        #cache = dict()                  # mapping of args to results
-        queue = deque()                 # order that keys have been used
-        refcount = Counter()            # times each key is in the queue
-        sentinel = object()             # marker for looping around the queue
+        recent = dict()                 # used keys, least recently used first
         stats = [0, 0, 0]               # make statistics updateable non-locally
         HIT, MISS, LOAD = 0, 1, 2       # names for the stats fields
         _len = len                      # localize the global len() function
@@ -719,11 +737,9 @@ class lru_cache(object):
         ignore = self.__state__['ignore']
         rounded_args = self.__state__['roundargs']
         purge = self.__state__['purge']
-        maxqueue = maxsize * 10 #XXX: settable? confirm this works as expected
 
         # lookup optimizations (ugly but fast)
-        queue_append, queue_popleft = queue.append, queue.popleft
-        queue_appendleft, queue_pop = queue.appendleft, queue.pop
+        recent_pop = recent.pop
 
         def wrapper(*args, **kwds):
             _args, _kwds = rounded_args(*args, **kwds)
@@ -733,9 +749,9 @@ class lru_cache(object):
             try:
                 # get cache entry
                 result = cache[key]
-                # record recent use of this key
-                queue_append(key)
-                refcount[key] += 1
+                # record recent use of this key (as the newest)
+                recent_pop(key, None)
+                recent[key] = None
                 stats[HIT] += 1
             except KeyError:
                 # if not in cache, look in archive
@@ -743,17 +759,17 @@ class lru_cache(object):
                     cache.load(key)
                 try:
                     result = cache[key]
-                    # record recent use of this key
-                    queue_append(key)
-                    refcount[key] += 1
+                    # record recent use of this key (as the newest)
+                    recent_pop(key, None)
+                    recent[key] = None
                     stats[LOAD] += 1
                 except KeyError:
                     # if not found, then compute
                     result = user_function(*args, **kwds)
                     cache[key] = result
-                    # record recent use of this key
-                    queue_append(key)
-                    refcount[key] += 1
+                    # record recent use of this key (as the newest)
+                    recent_pop(key, None)
+                    recent[key] = None
                     stats[MISS] += 1
 
                 # purge cache
@@ -762,28 +778,13 @@ class lru_cache(object):
                     if cache.archived() and purge:
                         cache.dump()
                         cache.clear() 
-                        queue.clear()
-                        refcount.clear()
+                        recent.clear()
                     else: # purge least recently used cache entry
-                        key = queue_popleft()
-                        refcount[key] -= 1
-                        while refcount[key]:
-                            key = queue_popleft()
-                            refcount[key] -= 1
+                        key = next(iter(recent))
+                        del recent[key]
                         if cache.archived(): cache.dump(key)
                         try: del cache[key]
                         except KeyError: pass #FIXME: possible none purged
-                        refcount.pop(key, None)
-
-            # periodically compact the queue by eliminating duplicate keys
-            # while preserving order of most recent access
-            if _len(queue) > maxqueue:
-                refcount.clear()
-                queue_appendleft(sentinel)
-                for key in filterfalse(refcount.__contains__,
-                                        iter(queue_pop, sentinel)):
-                    queue_appendleft(key)
-                    refcount[key] = 1
             return result
 
         def archive(obj):
@@ -818,8 +819,7 @@ class lru_cache(object):
         def clear(keepstats=False):
             """Clear the cache and statistics"""
             cache.clear()
-            queue.clear()
-            refcount.clear()
+            recent.clear()
             if not keepstats: stats[:] = [0, 0, 0]
 
         def info():
@@ -840,7 +840,6 @@ class lru_cache(object):
         wrapper.__cache__ = __get_cache
         wrapper.__mask__ = __get_mask
         wrapper.__map__ = __get_keymap
-       #wrapper._queue = queue #XXX
         return update_wrapper(wrapper, user_function)
 
     def __get__(self, obj, objtype):
@@ -950,9 +949,8 @@ class mru_cache(object):
         return
 
     def __call__(self, user_function):
-        from collections import deque
        #cache = dict()                  # mapping of args to results
-        queue = deque()                 # order that keys have been used
+        recent = [None]                 # the key used on the most recent call
         stats = [0, 0, 0]               # make statistics updateable non-locally
         HIT, MISS, LOAD = 0, 1, 2       # names for the stats fields
         _len = len                      # localize the global len() function
@@ -964,10 +962,6 @@ class mru_cache(object):
         rounded_args = self.__state__['roundargs']
         purge = self.__state__['purge']
 
-        # lookup optimizations (ugly but fast)
-        queue_append, queue_popleft = queue.append, queue.popleft
-        queue_appendleft, queue_pop = queue.appendleft, queue.pop
-
         def wrapper(*args, **kwds):
             _args, _kwds = rounded_args(*args, **kwds)
             _args, _kwds = _keygen(user_function, ignore, *_args, **_kwds)
@@ -976,8 +970,6 @@ class mru_cache(object):
             try:
                 # get cache entry
                 result = cache[key]
-                try: queue.remove(key)
-                except ValueError: pass
                 stats[HIT] += 1
             except KeyError:
                 # if not in cache, look in archive
@@ -998,15 +990,15 @@ class mru_cache(object):
                     if cache.archived() and purge:
                         cache.dump()
                         cache.clear() 
-                        queue.clear()
                     else: # purge most recently used cache entry
-                        k = queue_pop()
+                        # (always the key used on the previous call)
+                        k = recent[0]
                         if cache.archived(): cache.dump(k)
                         try: del cache[k]
                         except KeyError: pass #FIXME: possible none purged
 
             # record recent use of this key
-            queue_append(key)
+            recent[0] = key
             return result
 
         def archive(obj):
@@ -1041,7 +1033,7 @@ class mru_cache(object):
         def clear(keepstats=False):
             """Clear the cache and statistics"""
             cache.clear()
-            queue.clear()
+            recent[0] = None
             if not keepstats: stats[:] = [0, 0, 0]
 
         def info():
@@ -1062,7 +1054,7 @@ class mru_cache(object):
         wrapper.__cache__ = __get_cache
         wrapper.__mask__ = __get_mask
         wrapper.__map__ = __get_keymap
-       #wrapper._queue = queue #XXX
+       #wrapper._queue = None  #XXX
         return update_wrapper(wrapper, user_function)
 
     def __get__(self, obj, objtype):
@@ -1177,6 +1169,8 @@ class rr_cache(object):
         HIT, MISS, LOAD = 0, 1, 2       # names for the stats fields
         _len = len                      # localize the global len() function
        #lock = RLock()                  # linkedlist updates aren't threadsafe
+        keys = []                       # list of cached keys, to choose from
+        index = {}                      # mapping of keys to positions in keys
         maxsize = self.__state__['maxsize']
         cache = self.__state__['cache']
         keymap = self.__state__['keymap']
@@ -1184,8 +1178,22 @@ class rr_cache(object):
         rounded_args = self.__state__['roundargs']
         purge = self.__state__['purge']
 
+        def track():
+            """Rebuild keys from the live cache (e.g. after a load)"""
+            keys[:] = cache.keys()
+            index.clear()
+            index.update(zip(keys, range(_len(keys))))
+
+        def untrack(i):
+            """Remove the i-th key from keys, filling the gap with the last key"""
+            key, last = keys[i], keys[-1]
+            keys[i] = last
+            index[last] = i
+            keys.pop()
+            del index[key]
+            return key
+
         def wrapper(*args, **kwds):
-            from random import choice #XXX: biased?
             _args, _kwds = rounded_args(*args, **kwds)
             _args, _kwds = _keygen(user_function, ignore, *_args, **_kwds)
             key = keymap(*_args, **_kwds)
@@ -1206,6 +1214,9 @@ class rr_cache(object):
                     result = user_function(*args, **kwds)
                     cache[key] = result
                     stats[MISS] += 1
+                if key not in index:
+                    index[key] = _len(keys)
+                    keys.append(key)
 
                 # purge cache
                 if _len(cache) > maxsize:
@@ -1213,8 +1224,14 @@ class rr_cache(object):
                     if cache.archived() and purge:
                         cache.dump()
                         cache.clear() 
+                        index.clear()
+                        keys[:] = []
                     else: # purge random cache entry
-                        key = choice(list(cache.keys()))
+                        if _len(keys) != _len(cache): track()
+                        # untrack reorders keys, so after the first eviction
+                        # a seeded draw may pick another key than choice()
+                        # over cache.keys() would
+                        key = untrack(randrange(_len(keys)))
                         if cache.archived(): cache.dump(key)
                         try: del cache[key]
                         except KeyError: pass #FIXME: possible none purged
@@ -1252,6 +1269,8 @@ class rr_cache(object):
         def clear(keepstats=False):
             """Clear the cache and statistics"""
             cache.clear()
+            index.clear()
+            keys[:] = []
             if not keepstats: stats[:] = [0, 0, 0]
 
         def info():
@@ -1290,6 +1309,255 @@ class rr_cache(object):
         return (self.__class__, (maxsize, cache, keymap, ignore, tol, deep, purge))
 
 
+
+class clock_cache(object):
+    """CLOCK (approximate LRU) cache decorator.
+
+    This decorator memoizes a function's return value each time it is called.
+    If called later with the same arguments, the cached value is returned, and
+    not re-evaluated.  To avoid memory issues, a maximum cache size is imposed.
+    For caches with an archive, the full cache dumps to archive upon reaching
+    maxsize. For caches without an archive, the CLOCK algorithm manages the cache.
+    Caches with an archive will use the latter behavior when 'purge' is False.
+    This decorator takes an integer tolerance 'tol', equal to the number of
+    decimal places to which it will round off floats, and a bool 'deep' for
+    whether the rounding on inputs will be 'shallow' or 'deep'.  Note that
+    rounding is not applied to the calculation of new results, but rather as a
+    simple form of cache interpolation.  For example, with tol=0 and a cached
+    value for f(3.0), f(3.1) will lookup f(3.0) in the cache while f(3.6) will
+    store a new value; however if tol=1, both f(3.1) and f(3.6) will store
+    new values.
+
+    maxsize = maximum cache size
+    cache = storage hashmap (default is {})
+    keymap = cache key encoder (default is keymaps.hashmap(flat=True))
+    ignore = function argument names and indicies to 'ignore' (default is None)
+    tol = integer tolerance for rounding (default is None)
+    deep = boolean for rounding depth (default is False, i.e. 'shallow')
+    purge = boolean for purge cache to archive at maxsize (default is False)
+
+    If *maxsize* is None, this cache will grow without bound.
+
+    If *keymap* is given, it will replace the hashing algorithm for generating
+    cache keys.  Several hashing algorithms are available in 'keymaps'. The
+    default keymap requires arguments to the cached function to be hashable.
+
+    If the keymap retains type information, then arguments of different types
+    will be cached separately.  For example, f(3.0) and f(3) will be treated
+    as distinct calls with distinct results.  Cache typing has a memory penalty,
+    and may also be ignored by some 'keymaps'.
+
+    If *ignore* is given, the keymap will ignore the arguments with the names
+    and/or positional indicies provided. For example, if ignore=(0,), then
+    the key generated for f(1,2) will be identical to that of f(3,2) or f(4,2).
+    If ignore=('y',), then the key generated for f(x=3,y=4) will be identical
+    to that of f(x=3,y=0) or f(x=3,y=10). If ignore=('*','**'), all varargs
+    and varkwds will be 'ignored'.  Ignored arguments never trigger a
+    recalculation (they only trigger cache lookups), and thus are 'ignored'.
+    When caching class methods, it may be useful to ignore=('self',).
+
+    View cache statistics (hit, miss, load, maxsize, size) with f.info().
+    Clear the cache and statistics with f.clear().  Replace the cache archive
+    with f.archive(obj).  Load from the archive with f.load(), and dump from
+    the cache to the archive with f.dump().
+
+    CLOCK approximates LRU without reordering on a hit: a hit only sets the
+    entry's reference bit.  Keys are held in a circular list, and on eviction
+    a 'hand' sweeps the list, clearing set bits, until it finds a key whose
+    bit is clear.  The new key then takes the evicted key's place.
+
+    See: http://en.wikipedia.org/wiki/Page_replacement_algorithm#Clock
+    """
+    def __new__(cls, *args, **kwds):
+        maxsize = kwds.get('maxsize', -1)
+        if maxsize == 0:
+            return no_cache(*args, **kwds)
+        if maxsize is None:
+            return inf_cache(*args, **kwds)
+        return object.__new__(cls)
+
+    def __init__(self, maxsize=100, cache=None, keymap=None, ignore=None, tol=None, deep=False, purge=False):
+        if maxsize is None or maxsize == 0:
+            return
+        if cache is None: cache = archive_dict()
+        elif type(cache) is dict: cache = archive_dict(cache)
+
+        if keymap is None: keymap = hashmap(flat=True)
+        if ignore is None: ignore = tuple()
+
+        if deep: rounded = deep_round
+        else: rounded = simple_round
+       #else: rounded = shallow_round #FIXME: slow
+
+        @rounded(tol)
+        def rounded_args(*args, **kwds):
+            return (args, kwds)
+
+        # set state
+        self.__state__ = {
+            'maxsize': maxsize,
+            'cache': cache,
+            'keymap': keymap,
+            'ignore': ignore,
+            'roundargs': rounded_args,
+            'tol': tol,
+            'deep': deep,
+            'purge': purge,
+        }
+        return
+
+    def __call__(self, user_function):
+       #cache = dict()                  # mapping of args to results
+        stats = [0, 0, 0]               # make statistics updateable non-locally
+        HIT, MISS, LOAD = 0, 1, 2       # names for the stats fields
+        _len = len                      # localize the global len() function
+       #lock = RLock()                  # linkedlist updates aren't threadsafe
+        refbit = {}                     # mapping of keys to reference bits
+        ring = []                       # circular list of keys
+        hand = [0]                      # position of the clock hand
+        maxsize = self.__state__['maxsize']
+        cache = self.__state__['cache']
+        keymap = self.__state__['keymap']
+        ignore = self.__state__['ignore']
+        rounded_args = self.__state__['roundargs']
+        purge = self.__state__['purge']
+
+        def track(new):
+            """Rebuild the ring from the live cache (e.g. after a load)"""
+            ring[:] = [k for k in cache.keys() if k != new]
+            bits = dict((k, refbit.get(k, False)) for k in ring)
+            refbit.clear()
+            refbit.update(bits)
+            hand[0] = hand[0] % _len(ring) if ring else 0
+
+        def evict():
+            """Advance the hand to the next key with a clear reference bit"""
+            i, n = hand[0], _len(ring)
+            while refbit.get(ring[i]): # stale keys have no bit, so are taken
+                refbit[ring[i]] = False
+                i = (i + 1) % n
+            return i
+
+        def wrapper(*args, **kwds):
+            _args, _kwds = rounded_args(*args, **kwds)
+            _args, _kwds = _keygen(user_function, ignore, *_args, **_kwds)
+            key = keymap(*_args, **_kwds)
+
+            try:
+                # get cache entry
+                result = cache[key]
+                refbit[key] = True
+                stats[HIT] += 1
+            except KeyError:
+                # if not in cache, look in archive
+                if cache.archived():
+                    cache.load(key)
+                try:
+                    result = cache[key]
+                    stats[LOAD] += 1
+                except KeyError:
+                    # if not found, then compute
+                    result = user_function(*args, **kwds)
+                    cache[key] = result
+                    stats[MISS] += 1
+
+                # purge cache
+                if _len(cache) > maxsize and cache.archived() and purge:
+                    #XXX: better: if cache is cache.archive ?
+                    cache.dump()
+                    cache.clear()
+                    refbit.clear()
+                    ring[:] = []
+                    hand[0] = 0
+                elif _len(cache) > maxsize:
+                    if _len(ring) != _len(cache) - 1: track(key)
+                    # replace the first key found without a reference bit
+                    i = evict()
+                    old = ring[i]
+                    refbit.pop(old, None)
+                    if cache.archived(): cache.dump(old)
+                    try: del cache[old]
+                    except KeyError: pass #FIXME: possible none purged
+                    ring[i] = key
+                    refbit[key] = False
+                    hand[0] = (i + 1) % _len(ring)
+                else:
+                    ring.append(key)
+                    refbit[key] = False
+            return result
+
+        def archive(obj):
+            """Replace the cache archive"""
+            if isinstance(obj, archive_dict): cache.archive = obj.archive
+            else: cache.archive = obj
+
+        def key(*args, **kwds):
+            """Get the cache key for the given *args,**kwds"""
+            _args, _kwds = rounded_args(*args, **kwds)
+            _args, _kwds = _keygen(user_function, ignore, *_args, **_kwds)
+            return keymap(*_args, **_kwds)
+
+        def lookup(*args, **kwds):
+            """Get the stored value for the given *args,**kwds"""
+            _args, _kwds = rounded_args(*args, **kwds)
+            _args, _kwds = _keygen(user_function, ignore, *_args, **_kwds)
+            return cache[keymap(*_args, **_kwds)]
+
+        def __get_cache():
+            """Get the cache"""
+            return cache
+
+        def __get_mask():
+            """Get the (ignore) mask"""
+            return ignore
+
+        def __get_keymap():
+            """Get the keymap"""
+            return keymap
+
+        def clear(keepstats=False):
+            """Clear the cache and statistics"""
+            cache.clear()
+            refbit.clear()
+            ring[:] = []
+            hand[0] = 0
+            if not keepstats: stats[:] = [0, 0, 0]
+
+        def info():
+            """Report cache statistics"""
+            return CacheInfo(stats[HIT], stats[MISS], stats[LOAD], maxsize, len(cache))
+
+        # interface
+        wrapper.__wrapped__ = user_function
+        #XXX: better is handle to key_function=keygen(ignore)(user_function) ?
+        wrapper.info = info
+        wrapper.clear = clear
+        wrapper.load = cache.load
+        wrapper.dump = cache.dump
+        wrapper.archive = archive
+        wrapper.archived = cache.archived
+        wrapper.key = key
+        wrapper.lookup = lookup
+        wrapper.__cache__ = __get_cache
+        wrapper.__mask__ = __get_mask
+        wrapper.__map__ = __get_keymap
+       #wrapper._queue = None  #XXX
+        return update_wrapper(wrapper, user_function)
+
+    def __get__(self, obj, objtype):
+        """support instance methods"""
+        return partial(self.__call__, obj)
+
+    def __reduce__(self):
+        maxsize = self.__state__['maxsize']
+        cache = self.__state__['cache']
+        keymap = self.__state__['keymap']
+        ignore = self.__state__['ignore']
+        tol = self.__state__['tol']
+        deep = self.__state__['deep']
+        purge = self.__state__['purge']
+        return (self.__class__, (maxsize, cache, keymap, ignore, tol, deep, purge))
+
 if __name__ == '__main__':
     import dill
 
@@ -9,7 +9,30 @@
 #FIXME: klepto's caches ignore names/index, however ignore should be in keymap
 
 import inspect
+from weakref import WeakKeyDictionary
 from klepto.tools import IS_PYPY
+
+__argspecs = WeakKeyDictionary() # argspecs of python functions
+
+def _getfullargspec(func):
+    """get the argspec of a function, cached for python functions and methods
+
+    The cached argspec is reused while the function's code and defaults are
+    unchanged. Raises TypeError if func is not a python function."""
+    f = func.__func__ if inspect.ismethod(func) else func
+    if not inspect.isfunction(f):
+        return inspect.getfullargspec(func)
+    state = (f.__code__, f.__defaults__, f.__kwdefaults__)
+    try:
+        _state, arg_spec = __argspecs[f]
+        if all(i is j for (i,j) in zip(_state, state)):
+            return arg_spec
+    except KeyError:
+        pass
+    arg_spec = inspect.getfullargspec(f)
+    __argspecs[f] = (state, arg_spec)
+    return arg_spec
+
 def signature(func, variadic=True, markup=True, safe=False):
     """get the input signature of a function
 
@@ -97,7 +120,7 @@ def signature(func, variadic=True, markup=True, safe=False):
 
     FULL_ARGS = hasattr(inspect, 'getfullargspec')
     try:
-        if FULL_ARGS: arg_spec = inspect.getfullargspec(func)
+        if FULL_ARGS: arg_spec = _getfullargspec(func)
         else: arg_spec = inspect.getargspec(func)
     except TypeError:
         if safe: return LONG_FAIL if variadic else TINY_FAIL
@@ -387,6 +410,34 @@ NULL = _Null()
 #    from ordereddict import OrderedDict as odict
 
 from copy import copy
+from numbers import Integral
+from functools import lru_cache
+@lru_cache(maxsize=256)
+def _ignored(ignored, named):
+    """decompose the tuple of things to ignore to indicies and names
+
+    ignored is the tuple of names and/or indicies to ignore
+    named is the tuple of explicitly named arguments of the function
+
+    returns (indicies, names, ignore varargs, ignore varkwds), where the
+    indicies and names are cross-populated for the explicitly named arguments
+    """
+    index_to_ignore = set(i for i in ignored if isinstance(i, Integral))
+    names_to_ignore = set(i for i in ignored if isinstance(i, str))
+
+    # remove markers for ignoring all varagrs and all varkwds
+    varargs_to_ignore = '*' in names_to_ignore
+    varkwds_to_ignore = '**' in names_to_ignore
+    names_to_ignore -= set(['*','**'])
+
+    # cross-populate names_to_ignore and index_to_ignore for explicitly_named
+    names_index = dict(enumerate(named))
+    _index = set(i for (i,k) in names_index.items() if k in names_to_ignore)
+    _names = set(k for (i,k) in names_index.items() if i in index_to_ignore)
+    names_to_ignore = frozenset(names_to_ignore.union(_names))
+    index_to_ignore = frozenset(index_to_ignore.union(_index))
+    return index_to_ignore, names_to_ignore, varargs_to_ignore, varkwds_to_ignore
+
 def _keygen(func, ignored, *args, **kwds):
     """generate a 'key' from the (*args,**kwds) suitable for use in caching
 
@@ -420,11 +471,7 @@ def _keygen(func, ignored, *args, **kwds):
     else: # don't apply the function defaults (why, you wouldn't, I don't know)
         user_kwds = kwds.copy()
 
-    # decompose the list of things to ignore to names and indicies
-    from numbers import Integral
-    if isinstance(ignored, (str, Integral)): ignored = [ignored]
-    index_to_ignore = set(i for i in ignored if isinstance(i, Integral))
-    names_to_ignore = set(i for i in ignored if isinstance(i, str))
+    if isinstance(ignored, (str, Integral)): ignored = (ignored,)
 
     # if ignore self, remove self instead of NULL it
     if inspect.isfunction(func):
@@ -440,25 +487,23 @@ def _keygen(func, ignored, *args, **kwds):
             explicitly_named = explicitly_named[1:]  # remove 'self' name
             #XXX: hopefully, this doesn't mess up arg counting and other stuff
 
-    # remove markers for ignoring all varagrs and all varkwds
-    varargs_to_ignore = '*' in names_to_ignore
-    varkwds_to_ignore = '**' in names_to_ignore
-    names_to_ignore -= set(['*','**'])
+    # decompose the things to ignore to names and indicies (cached), where
+    # only str and int are cached, as 1 == 1.0 would share a cache entry
+    if all(type(i) in (str, int) for i in ignored):
+        ignoring = _ignored(tuple(ignored), tuple(explicitly_named))
+    else:
+        ignoring = _ignored.__wrapped__(ignored, explicitly_named)
+    index_to_ignore, names_to_ignore = ignoring[:2]
+    varargs_to_ignore, varkwds_to_ignore = ignoring[2:]
 #   var_index_to_ignore = {i for i in index_to_ignore if i >= len(explicitly_named)}
 #   fix_index_to_ignore = index_to_ignore - var_index_to_ignore
 #   fix_names_to_ignore = {i for i in names_to_ignore if i in explicitly_named}
 #   var_names_to_ignore = names_to_ignore - fix_names_to_ignore - set(['*','**'])
 
-    # cross-populate names_to_ignore and index_to_ignore for explicitly_named
-    names_index = dict(enumerate(explicitly_named))
-    _index = set(i for (i,k) in names_index.items() if k in names_to_ignore)
-    _names = set(k for (i,k) in names_index.items() if i in index_to_ignore)
-    names_to_ignore = names_to_ignore.union(_names)
-    index_to_ignore = index_to_ignore.union(_index)
-
     # NULL out the ignored args (and also drop not in user_args)
     #XXX: better if user_args always include NAMES/INDEX from ignored?  NO.
-    user_args = tuple(NULL if i in index_to_ignore else k for i,k in enumerate(user_args))
+    if index_to_ignore:
+        user_args = tuple(NULL if i in index_to_ignore else k for i,k in enumerate(user_args))
     # if ignoring *args, clip off all args that are varargs
     if varargs_to_ignore:
         user_args = user_args[:len(explicitly_named)]
@@ -466,8 +511,9 @@ def _keygen(func, ignored, *args, **kwds):
     # NULL out the ignored kwds (also drop not in user_kwds + explicitly_named)
     #XXX: better if user_kwds always include NAMES/INDEX from ignored?  MAYBE.
    #user_kwds.update(dict([(k,NULL) for k in names_to_ignore])) #(see above)
-    _keys = tuple(user_kwds.keys()) + explicitly_named
-    user_kwds.update(dict([(k,NULL) for k in names_to_ignore if k in _keys]))
+    if names_to_ignore:
+        _keys = tuple(user_kwds.keys()) + explicitly_named
+        user_kwds.update(dict([(k,NULL) for k in names_to_ignore if k in _keys]))
     # if ignoring **kwds, then pop all not in explicitly_named
     if varkwds_to_ignore:
         [user_kwds.pop(k) for k in kwds if k not in explicitly_named]
@@ -90,7 +90,8 @@ def write_zfile(file_handle, data, compress=1):
     length = hex(len(data))
     # Store the length of the data
     file_handle.write(asbytes(length.ljust(_MAX_LEN)))
-    file_handle.write(zlib.compress(asbytes(data), compress))
+    if isinstance(data, _basestring): data = asbytes(data)
+    file_handle.write(zlib.compress(data, compress)) # any contiguous buffer
 
 
 ###############################################################################
@@ -212,11 +213,19 @@ class NumpyPickler(Pickler):
             # Efficient compressed storage:
             # The meta data is stored in the container, and the core
             # numerics in a z-file
-            _, init_args, state = array.__reduce__()
-            # the last entry of 'state' is the data itself
+            flags = array.flags
+            if array.dtype.hasobject or \
+               not (flags.c_contiguous or flags.f_contiguous):
+                _, init_args, state = array.__reduce__()
+                # the last entry of 'state' is the data itself
+                data, state = state[-1], state[:-1]
+            else: # compress the array's own memory, without a bytes copy
+                init_args = (type(array), (0,), asbytes('b'))
+                state = (1, array.shape, array.dtype, not flags.c_contiguous)
+                data = array.view(self.np.ndarray) # as matrix stays 2d
+                data = data.reshape(-1, order='A').view(self.np.uint8)
             with open(filename, 'wb') as zfile:
-                write_zfile(zfile, state[-1], compress=self.compress)
-            state = state[:-1]
+                write_zfile(zfile, data, compress=self.compress)
             container = ZNDArrayWrapper(os.path.basename(filename),
                                             init_args, state)
         return container, filename
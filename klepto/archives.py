@@ -8,7 +8,7 @@
 """
 custom caching dict, which archives results to memory, file, or database
 """
-from ._archives import cache, archive
+from ._archives import cache, archive, _sized_cache
 from ._archives import dict_archive as _dict_archive
 from ._archives import null_archive as _null_archive
 from ._archives import dir_archive as _dir_archive
@@ -18,11 +18,44 @@ from ._archives import sqltable_archive as _sqltable_archive
 from ._archives import hdf_archive as _hdf_archive
 from ._archives import hdfdir_archive as _hdfdir_archive
 from ._archives import _sqlname, _from_frame, _to_frame
+from pickle import HIGHEST_PROTOCOL
+import sys
 
 __all__ = ['cache','dict_archive','null_archive','dir_archive',\
            'file_archive','sql_archive','sqltable_archive',\
            'hdf_archive','hdfdir_archive']
 
+def _build(backend, args, dict, cached, kwds):
+    """build an archive, then optionally wrap it in a cache and seed it
+
+    backend: archive class (e.g. _dir_archive) used to build the archive
+    args: tuple of positional arguments for the archive class
+    dict: initial dictionary to seed the archive
+    cached: if True, interact through an in-memory cache
+    kwds: dict of keyword arguments for the archive class
+
+    If kwds includes cache_size, the in-memory cache holds at most cache_size
+    entries, dumping the least-recently-used entries to the archive. A
+    cache_size is only valid with cached=True.
+    """
+    size = kwds.pop('cache_size', None)
+    if size is not None and not cached:
+        raise ValueError("cache_size requires cached=True")
+    if backend not in (_dict_archive, _null_archive) \
+       and not kwds.get('meta', False): # meta uses protocol=0
+        kwds.setdefault('protocol', HIGHEST_PROTOCOL)
+    archive = backend(*args, **kwds)
+    if cached and size is not None:
+        archive = _sized_cache(archive=archive, maxsize=size)
+    elif cached: # cache doesn't override item access, so dict speed is kept
+        archive = cache(archive=archive)
+    if dict: archive.update(dict)
+    return archive
+
+def _from_frame_as(cls, dataframe):
+    """convert a (formatted) pandas dataframe to an archive of the given class"""
+    return _from_frame(dataframe, cls.__name__) # the dataframe is not modified
+
 class dict_archive(_dict_archive):
     def __new__(dict_archive, name=None, dict=None, cached=True, **kwds):
         """initialize a dictionary with an in-memory dictionary archive backend
@@ -31,21 +64,14 @@ class dict_archive(_dict_archive):
         name (str, default=None): (optional) identifier string
         dict (dict, default={}): initial dictionary to seed the archive
         cached (bool, default=True): interact through an in-memory cache
+        cache_size (int, default=None): max entries in cache (None is unbounded)
         """
-        if dict is None: dict = {}
-        archive = _dict_archive()
-        archive.__state__['id'] = None if name is None else str(name)
-        if cached: archive = cache(archive=archive)
-        archive.update(dict)
-        return archive
+        name = None if name is None else sys.intern(str(name))
+        size = kwds.get('cache_size', None)
+        kwds = {'__magic_key_0192837465__': name, 'cache_size': size}
+        return _build(_dict_archive, (), dict, cached, kwds)
 
-    @classmethod
-    def from_frame(dict_archive, dataframe):
-        try:
-            dataframe = dataframe.copy()
-            dataframe.columns.name = dict_archive.__name__
-        except AttributeError: pass
-        return _from_frame(dataframe)
+    from_frame = classmethod(_from_frame_as)
     pass
 
 class null_archive(_null_archive):
@@ -56,21 +82,14 @@ class null_archive(_null_archive):
         name (str, default=None): (optional) identifier string
         dict (dict, default={}): initial dictionary to seed the archive
         cached (bool, default=True): interact through an in-memory cache
+        cache_size (int, default=None): max entries in cache (None is unbounded)
         """
-        if dict is None: dict = {}
-        archive = _null_archive()
-        archive.__state__['id'] = None if name is None else str(name)
-        if cached: archive = cache(archive=archive)
-        archive.update(dict)
-        return archive
+        name = None if name is None else sys.intern(str(name))
+        size = kwds.get('cache_size', None)
+        kwds = {'__magic_key_0192837465__': name, 'cache_size': size}
+        return _build(_null_archive, (), dict, cached, kwds)
 
-    @classmethod
-    def from_frame(null_archive, dataframe):
-        try:
-            dataframe = dataframe.copy()
-            dataframe.columns.name = null_archive.__name__
-        except AttributeError: pass
-        return _from_frame(dataframe)
+    from_frame = classmethod(_from_frame_as)
     pass
 
 class dir_archive(_dir_archive):
@@ -81,26 +100,17 @@ class dir_archive(_dir_archive):
         name (str, default='memo'): path of the archive root directory
         dict (dict, default={}): initial dictionary to seed the archive
         cached (bool, default=True): interact through an in-memory cache
+        cache_size (int, default=None): max entries in cache (None is unbounded)
         serialized (bool, default=True): save python objects in pickled files
         compression (int, default=0): compression level (0 to 9), 0 is None
         permissions (octal, default=0o775): read/write permission indicator
         memmode (str, default=None): mode, one of ``{None, 'r+', 'r', 'w+', 'c'}``
         memsize (int, default=100): size (MB) of cache for in-memory compression
-        protocol (int, default=DEFAULT_PROTOCOL): pickling protocol
+        protocol (int, default=HIGHEST_PROTOCOL): pickling protocol
         """
-        if dict is None: dict = {}
-        archive = _dir_archive(name, **kwds)
-        if cached: archive = cache(archive=archive)
-        archive.update(dict)
-        return archive
+        return _build(_dir_archive, (name,), dict, cached, kwds)
 
-    @classmethod
-    def from_frame(dir_archive, dataframe):
-        try:
-            dataframe = dataframe.copy()
-            dataframe.columns.name = dir_archive.__name__
-        except AttributeError: pass
-        return _from_frame(dataframe)
+    from_frame = classmethod(_from_frame_as)
     pass
 
 class file_archive(_file_archive):
@@ -111,22 +121,24 @@ class file_archive(_file_archive):
         name (str, default='memo.pkl'): path of the file archive
         dict (dict, default={}): initial dictionary to seed the archive
         cached (bool, default=True): interact through an in-memory cache
+        cache_size (int, default=None): max entries in cache (None is unbounded)
         serialized (bool, default=True): save python objects in pickled file
-        protocol (int, default=DEFAULT_PROTOCOL): pickling protocol
+        protocol (int, default=HIGHEST_PROTOCOL): pickling protocol
+        optimize_pickle (bool, default=False): optimize the pickled seed dict
+
+    If optimize_pickle is True, and the archive is not cached, unused memo
+    entries are stripped from the pickle of the seed dict when it is large.
         """
-        if dict is None: dict = {}
-        archive = _file_archive(name, **kwds)
-        if cached: archive = cache(archive=archive)
-        archive.update(dict)
+        optimize = kwds.pop('optimize_pickle', False)
+        if not optimize or cached or not dict:
+            return _build(_file_archive, (name,), dict, cached, kwds)
+        archive = _build(_file_archive, (name,), None, cached, kwds)
+        memo = archive.__asdict__()
+        memo.update(dict)
+        archive.__save__(memo, optimize=True)
         return archive
 
-    @classmethod
-    def from_frame(file_archive, dataframe):
-        try:
-            dataframe = dataframe.copy()
-            dataframe.columns.name = file_archive.__name__
-        except AttributeError: pass
-        return _from_frame(dataframe)
+    from_frame = classmethod(_from_frame_as)
     pass
 
 class sqltable_archive(_sqltable_archive):
@@ -151,23 +163,13 @@ class sqltable_archive(_sqltable_archive):
         name (str, default=None): url for database table (see above note)
         dict (dict, default={}): initial dictionary to seed the archive
         cached (bool, default=True): interact through an in-memory cache
+        cache_size (int, default=None): max entries in cache (None is unbounded)
         serialized (bool, default=True): save objects as pickled strings
-        protocol (int, default=DEFAULT_PROTOCOL): pickling protocol
+        protocol (int, default=HIGHEST_PROTOCOL): pickling protocol
         """
-        if dict is None: dict = {}
-        db, table = _sqlname(name)
-        archive = _sqltable_archive(db, table, **kwds)
-        if cached: archive = cache(archive=archive)
-        archive.update(dict)
-        return archive
+        return _build(_sqltable_archive, _sqlname(name), dict, cached, kwds)
 
-    @classmethod
-    def from_frame(sqltable_archive, dataframe):
-        try:
-            dataframe = dataframe.copy()
-            dataframe.columns.name = sqltable_archive.__name__
-        except AttributeError: pass
-        return _from_frame(dataframe)
+    from_frame = classmethod(_from_frame_as)
     pass
 
 class sql_archive(_sql_archive):
@@ -190,22 +192,13 @@ class sql_archive(_sql_archive):
         name (str, default=None): database url (see above note)
         dict (dict, default={}): initial dictionary to seed the archive
         cached (bool, default=True): interact through an in-memory cache
+        cache_size (int, default=None): max entries in cache (None is unbounded)
         serialized (bool, default=True): save objects as pickled strings
-        protocol (int, default=DEFAULT_PROTOCOL): pickling protocol
+        protocol (int, default=HIGHEST_PROTOCOL): pickling protocol
         """
-        if dict is None: dict = {}
-        archive = _sql_archive(name, **kwds)
-        if cached: archive = cache(archive=archive)
-        archive.update(dict)
-        return archive
+        return _build(_sql_archive, (name,), dict, cached, kwds)
 
-    @classmethod
-    def from_frame(sql_archive, dataframe):
-        try:
-            dataframe = dataframe.copy()
-            dataframe.columns.name = sql_archive.__name__
-        except AttributeError: pass
-        return _from_frame(dataframe)
+    from_frame = classmethod(_from_frame_as)
     pass
 
 class hdfdir_archive(_hdfdir_archive):
@@ -216,24 +209,17 @@ class hdfdir_archive(_hdfdir_archive):
         name (str, default='memo'): path of the archive root directory
         dict (dict, default={}): initial dictionary to seed the archive
         cached (bool, default=True): interact through an in-memory cache
+        cache_size (int, default=None): max entries in cache (None is unbounded)
         serialized (bool, default=True): pickle saved python objects
         permissions (octal, default=0o775): read/write permission indicator
-        protocol (int, default=DEFAULT_PROTOCOL): pickling protocol
+        protocol (int, default=HIGHEST_PROTOCOL): pickling protocol
         meta (bool, default=False): store in root metadata (not in dataset)
+        chunks (bool, default=True): store unserialized arrays over 1 MB in chunks
+        compression (str, default=None): filter for chunked arrays (e.g. 'lzf')
         """
-        if dict is None: dict = {}
-        archive = _hdfdir_archive(name, **kwds)
-        if cached: archive = cache(archive=archive)
-        archive.update(dict)
-        return archive
+        return _build(_hdfdir_archive, (name,), dict, cached, kwds)
 
-    @classmethod
-    def from_frame(hdfdir_archive, dataframe):
-        try:
-            dataframe = dataframe.copy()
-            dataframe.columns.name = hdfdir_archive.__name__
-        except AttributeError: pass
-        return _from_frame(dataframe)
+    from_frame = classmethod(_from_frame_as)
     pass
 
 class hdf_archive(_hdf_archive):
@@ -244,23 +230,16 @@ class hdf_archive(_hdf_archive):
         name (str, default='memo.hdf5'): path of the file archive
         dict (dict, default={}): initial dictionary to seed the archive
         cached (bool, default=True): interact through an in-memory cache
+        cache_size (int, default=None): max entries in cache (None is unbounded)
         serialized (bool, default=True): pickle saved python objects
-        protocol (int, default=DEFAULT_PROTOCOL): pickling protocol
+        protocol (int, default=HIGHEST_PROTOCOL): pickling protocol
         meta (bool, default=False): store in root metadata (not in dataset)
+        chunks (bool, default=True): store unserialized arrays over 1 MB in chunks
+        compression (str, default=None): filter for chunked arrays (e.g. 'lzf')
         """
-        if dict is None: dict = {}
-        archive = _hdf_archive(name, **kwds)
-        if cached: archive = cache(archive=archive)
-        archive.update(dict)
-        return archive
+        return _build(_hdf_archive, (name,), dict, cached, kwds)
 
-    @classmethod
-    def from_frame(hdf_archive, dataframe):
-        try:
-            dataframe = dataframe.copy()
-            dataframe.columns.name = hdf_archive.__name__
-        except AttributeError: pass
-        return _from_frame(dataframe)
+    from_frame = classmethod(_from_frame_as)
     pass
 
 
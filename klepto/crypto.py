@@ -11,32 +11,73 @@ import sys
 import hashlib
 import pkgutil
 import encodings as codecs
+import threading
+from io import BytesIO
+from functools import lru_cache
+from pickle import dumps as _dumps
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 __hash = hash
 
+@lru_cache(maxsize=None) # computed once, as lookups are slow
 def algorithms():
     """return a tuple of available hash algorithms"""
     try:
         algs =  tuple(hashlib.algorithms_available)
     except:
         algs = ('md5', 'sha1', 'sha224', 'sha256', 'sha384', 'sha512')
+    if xxhash is not None: # fast, but not cryptographic
+        algs += ('xxhash',)
+        if hasattr(xxhash, 'xxh3_64'): # faster still, for short input
+            algs += ('xxh3',)
     return (None,) + algs
 
-def hash(object, algorithm=None):
+def _constructor(name):
+    """get the hashlib constructor for the named algorithm
+
+    Where an algorithm is blocked for security use (e.g. md5 in FIPS mode),
+    the constructor is flagged as not for security, as keys aren't secrets."""
+    new = getattr(hashlib, name)
+    try:
+        new(b'')
+    except ValueError:
+        from functools import partial
+        new = partial(new, usedforsecurity=False)
+    return new
+
+# direct constructors, to avoid the name lookup in hashlib.new on each call
+__constructors = dict((name, _constructor(name)) for name in \
+                      hashlib.algorithms_guaranteed if hasattr(hashlib, name))
+if xxhash is not None:
+    __constructors['xxhash'] = xxhash.xxh64
+    if hasattr(xxhash, 'xxh3_64'): # xxhash >= 2.0
+        __constructors['xxh3'] = xxhash.xxh3_64
+
+def hash(object, algorithm=None, **kwds):
     if algorithm is None:
         return __hash(object)
-    return hashlib.new(algorithm, repr(object).encode()).hexdigest()
+    data = repr(object).encode()
+    new = __constructors.get(algorithm)
+    if new is None:
+        return hashlib.new(algorithm, data, **kwds).hexdigest()
+    return new(data, **kwds).hexdigest()
 hash.algorithms = algorithms
 hash.__doc__ = \
 """cryptographic hashing
 
     algorithm: one of %s
-    The default is algorithm=None, which uses python's 'hash'.""" % repr(algorithms())
+    The default is algorithm=None, which uses python's 'hash'.
+
+    Additional kwds (e.g. digest_size for 'blake2b') configure the hasher.""" % repr(algorithms())
 
 
+@lru_cache(maxsize=None)
 def encodings():
     """return a tuple of available encodings and string-like types"""
     try:
-        algs = set([modname for importer, modname, ispkg in pkgutil.walk_packages(path=[os.path.dirname(codecs.__file__)], prefix='')])
+        algs = set([modname for importer, modname, ispkg in pkgutil.iter_modules(path=[os.path.dirname(codecs.__file__)])])
     except:
         algs = set()
     algs = algs.union(set(codecs.aliases.aliases.values()))
@@ -52,6 +93,9 @@ def encodings():
         # (any '*_codec' throws 'str' does not support the buffer interface)
     stype = ('str','repr')
     return (None,) + tuple(algs) + stype + utype
+
+__encodings = frozenset(encodings()) # for fast membership testing
+__casts = {'str': str, 'repr': repr, 'bytes': bytes, 'ascii': ascii} # builtin casts
     
 
 def string(object, encoding=None, strict=True):
@@ -70,12 +114,13 @@ def string(object, encoding=None, strict=True):
     if encoding is None:
         return str(object)
     try:
-        if strict and encoding not in encodings():
+        if strict and encoding not in __encodings:
             raise NameError
+        cast = __casts[encoding] # KeyError for encodings that aren't types
         try: #FIXME: 'bytes' not quite right for python3.x
-            return eval("%s(object)" % encoding) #XXX: safer is %s(repr(object))
+            return cast(object) #XXX: safer is cast(repr(object))
         except TypeError: # special case for bytes: object is a string
-            return eval("%s(object, 'utf_8')" % encoding)
+            return cast(object, 'utf_8')
     except:
         if strict: strict = 'strict'
         elif strict is None: strict = 'ignore'
@@ -85,6 +130,7 @@ def string(object, encoding=None, strict=True):
 string.encodings = encodings
 
 
+@lru_cache(maxsize=None)
 def serializers(): #FIXME: could be much smarter
     """return a tuple of string names of serializers"""
     serializers = (None, 'pickle', 'json', 'dill')
@@ -96,6 +142,59 @@ def serializers(): #FIXME: could be much smarter
     return serializers
 
 
+__modules = {} # serializer modules, imported on first use
+__picklers = threading.local() # reusable dill picklers, for each thread
+__atoms = frozenset((type(None), bool, int, float, str, bytes))
+
+def _builtin(object, size=1000):
+    """check if an object is only built from basic python types
+
+    Returns False for objects with more than size items (or self-references).
+    Such objects are saved by dill exactly as by pickle, for protocol >= 3."""
+    stack = [object]
+    while stack:
+        size -= 1
+        if size < 0: return False
+        object = stack.pop()
+        kind = type(object)
+        if kind in __atoms: continue
+        if kind is tuple or kind is list: stack.extend(object)
+        elif kind is dict:
+            stack.extend(object.keys())
+            stack.extend(object.values())
+        else: return False
+    return True
+
+def _dill_dumps(object, **kwds):
+    """pickle an object with dill, reusing a pickler and buffer for each thread
+
+    The result is identical to dill.dumps(object, **kwds)."""
+    import dill
+    options = kwds.copy()
+    protocol = options.pop('protocol', None)
+    if protocol is None: protocol = dill.settings['protocol']
+    protocol = int(protocol)
+    # dill options don't apply to basic types, so use the (faster) C pickler
+    if (protocol < 0 or protocol >= 3) and _builtin(object):
+        return _dumps(object, protocol)
+    picklers = __picklers.__dict__
+    try: # picklers are configured on creation, so key on the settings used
+        config = (protocol, tuple(options.items()), tuple(dill.settings.values()))
+        buffer, pickler = picklers.pop(config) # not shared while in use
+    except TypeError: # unhashable kwds
+        return dill.dumps(object, **kwds)
+    except KeyError:
+        buffer = BytesIO()
+        pickler = dill.Pickler(buffer, protocol, **options)
+    pickler.dump(object) # on error, the pickler is discarded
+    try:
+        return buffer.getvalue()
+    finally: # don't keep the object (or its pickle) alive in the pool
+        pickler.clear_memo()
+        buffer.seek(0)
+        buffer.truncate()
+        picklers[config] = buffer, pickler
+
 def pickle(object, serializer=None, **kwds):
     """pickle an object (to a string)
 
@@ -109,11 +208,17 @@ def pickle(object, serializer=None, **kwds):
         if not isinstance(serializer, str):
             raise TypeError("'%s' is not a module" % repr(serializer))
         try: # is a string
-            serializer = __import__(serializer)
-        except:
-            raise NameError("name '%s' is not defined" % serializer)
+            serializer = __modules[serializer]
+        except KeyError:
+            try:
+                __modules[serializer] = __import__(serializer)
+            except:
+                raise NameError("name '%s' is not defined" % serializer)
+            serializer = __modules[serializer]
     # now serializer is a module, work with it
     try:
+        if serializer.__name__ == 'dill':
+            return _dill_dumps(object, **kwds)
         return serializer.dumps(object, **kwds)
     except TypeError:
         return serializer.dumps(object) #XXX: better alternative behavior?
@@ -25,8 +25,41 @@ NOSENTINEL = _NoSentinel()
 # SENTINEL = object()
 # NOSENTINEL = (SENTINEL,)  #XXX: use to indicate "don't use a sentinel" ?
 
-from copy import copy
 from klepto.crypto import hash, string, pickle
+from hashlib import blake2b as _blake2b
+
+def _truncated(key, items=32):
+    """replace each numpy array in the key with a short summary of the array
+
+    Arrays are summarized as (shape, dtype, head, tail), where head and tail
+    are the bytes of the first and last 'items' elements (or if items is None,
+    head is a 'blake2b' digest of all the elements, and tail is empty).  Arrays
+    are found in the key, and inside any tuples, lists, or dicts in the key.
+    Arrays of python objects are left as is, as their bytes are only memory
+    addresses.
+    """
+    kind = type(key)
+    if kind in (tuple, list):
+        return kind(_truncated(k, items) for k in key)
+    if kind is dict:
+        return dict((k, _truncated(v, items)) for (k, v) in key.items())
+    if kind.__name__ != 'ndarray' or key.dtype.hasobject:
+        return key
+    if items is None: # digest the buffer, as the repr of the bytes is slow
+        # (a byte view, as buffers of datetimes and timedeltas are rejected)
+        data = key.reshape(-1).view('u1') if key.flags.c_contiguous \
+               else key.tobytes()
+        return (key.shape, key.dtype.str, _blake2b(data, digest_size=16).digest(), b'')
+    if key.size <= 2 * items:
+        return (key.shape, key.dtype.str, key.tobytes(), b'')
+    return (key.shape, key.dtype.str, key.flat[:items].tobytes(), \
+            key.flat[-items:].tobytes())
+
+def _contents(key):
+    """replace each numpy array in the key with its shape, dtype, and digest"""
+    return _truncated(key, None)
+
+_strategies = {None: None, 'truncated-prefix': _truncated, 'bytes': _contents}
 
 def _stub_decoder(keymap=None):
     "generate a keymap decoder from information in the keymap stub"
@@ -80,6 +113,9 @@ class keymap(object):
     and thus it is easy to recover the original input signature.  However,
     to use an object as a key, the object must be hashable.
     """
+    __slots__ = ('typed', 'flat', '_mark', '__inner__', '__outer__', \
+                 '__stub__', '__type__', '_fasttypes', '_sorted', '_tuple', \
+                 '_type', '_len', '_config', '__dict__') # allow new attributes
     def __init__(self, typed=False, flat=True, sentinel=NOSENTINEL, **kwds):
         '''initialize the key builder
 
@@ -158,10 +194,12 @@ class keymap(object):
     def __sentinel(self, mark):
         if mark != NOSENTINEL:
             self._mark = (mark,)
-        else: self._mark = None
+        else: self._mark = () # so always safe to concatenate
 
     def __call__(self, *args, **kwds):
         'generate a key from optionally typed positional and keyword arguments'
+        #NOTE: __call__ is looked up on the type, so can't be bound per instance;
+        # and a bound encode stored on self would be stale after copy or pickle
         if self.flat:
             return self.encode(*args, **kwds)
         return self.encrypt(*args, **kwds)
@@ -170,33 +208,45 @@ class keymap(object):
         """use a non-flat scheme for generating a key"""
         key = (args, kwds) #XXX: pickles larger, but is simpler to unpack
         if self.typed:
+            _tuple, _type = self._tuple, self._type
             sorted_items = self._sorted(list(kwds.items()))
-            key += (self._tuple(self._type(v) for v in args), \
-                    self._tuple(self._type(v) for (k,v) in sorted_items))
+            key += (_tuple(_type(v) for v in args), \
+                    _tuple(_type(v) for (k,v) in sorted_items))
         # __chain__
-        if self.outer:
-            return self.inner(key)
+        if self.__outer__:
+            return self.__inner__(key)
         return key
 
     def encode(self, *args, **kwds):
         """use a flattened scheme for generating a key"""
+        if not kwds and not self.typed: # fast path for the common f(x)
+            key = args
+            if self._len(args) == 1 and self._type(args[0]) in self._fasttypes:
+                key = args[0]
+            if self.__outer__:
+                return self.__inner__(key)
+            return key
+        mark, typed, _type = self._mark, self.typed, self._type # bind locals
         key = args
-        if kwds:
+        if kwds: # get items and types in a single pass
             sorted_items = self._sorted(list(kwds.items()))
-            if self._mark: key += self._mark
+            key += mark
+            kwdstypes = []
             for item in sorted_items:
                 key += item
-        if self.typed: #XXX: 'mark' between each part, so easy to split
-            if self._mark: key += self._mark
-            key += self._tuple(self._type(v) for v in args)
+                if typed: kwdstypes.append(_type(item[1]))
+        if typed: #XXX: 'mark' between each part, so easy to split
+            _tuple = self._tuple
+            key += mark
+            key += _tuple(_type(v) for v in args)
             if kwds:
-                if self._mark: key += self._mark
-                key += self._tuple(self._type(v) for (k,v) in sorted_items)
-        elif self._len(key) == 1 and self._type(key[0]) in self._fasttypes:
+                key += mark
+                key += _tuple(kwdstypes)
+        elif self._len(key) == 1 and _type(key[0]) in self._fasttypes:
             key = key[0]
         # __chain__
-        if self.outer:
-            return self.inner(key)
+        if self.__outer__:
+            return self.__inner__(key)
         return key
 
     def decrypt(self, key):
@@ -215,14 +265,38 @@ class keymap(object):
         """a more pickle-like interface for decoding a key"""
         return self.decode(key)
 
+    def __getstate__(self):
+        """get the state of the keymap (as a dict)"""
+        state = dict(getattr(self, '__dict__', ()))
+        for cls in type(self).__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                if name == '__dict__': continue # already in the state
+                try: state[name] = getattr(self, name)
+                except AttributeError: pass # e.g. __type__ is unset in keymap
+        return state
+
+    def __setstate__(self, state):
+        """set the state of the keymap (from a dict)"""
+        if type(state) is tuple: # (dict, slots), from the default protocol
+            state = dict(state[0] or (), **(state[1] or {}))
+        for (name, value) in state.items():
+            setattr(self, name, value)
+        if getattr(self, '_mark', ()) is None: # pickled by a prior version
+            self._mark = ()
+        if isinstance(self, hashmap) and not hasattr(self, '_arrays'):
+            self._arrays = None # pickled by a prior version
+        return
+
     def __add__(self, other):
         """concatenate two keymaps, to produce a new keymap"""
         if not isinstance(other, keymap):
             raise TypeError("can't concatenate '%s' and '%s' objects" % (self.__class__.__name__, other.__class__.__name__))
-        k = copy(other)
+        cls = other.__class__ # a shallow copy, without the copy module overhead
+        k = cls.__new__(cls)
+        k.__setstate__(other.__getstate__())
        #k.__chain__ = __chain__(self, k)
-        k.__inner__ = copy(self)  #XXX: or just... self ?
-        k.__outer__ = copy(other) #XXX: or just... other ?
+        k.__inner__ = self  # not modified by the chain, so no need to copy
+        k.__outer__ = other
         return k
 
     # interface
@@ -240,6 +314,7 @@ class hashmap(keymap):
     is fast, however there is not a method to recover the input signature
     from a hash.
     """ #XXX: algorithm as first argument? easier to build, but less standard
+    __slots__ = ('_arrays',)
     def __init__(self, typed=False, flat=True, sentinel=NOSENTINEL, **kwds):
         '''initialize the key builder
 
@@ -247,6 +322,10 @@ class hashmap(keymap):
         flat: if True, flatten the key to a sequence; if False, use (args, kwds)
         sentinel: marker for separating args and kwds in flattened keys
         algorithm: string name of hashing algorithm [default: use python's hash]
+        fast: if True, default to a 16-byte 'blake2b' hash [default: False]
+        ndarray_strategy: if 'truncated-prefix', hash numpy arrays by shape,
+            dtype, and first and last 32 items; if 'bytes', hash numpy arrays
+            by shape, dtype, and all items [default: use the array's repr]
 
         This keymap stores function args and kwds as (args, kwds) if flat=False,
         or a flattened ``(*args, zip(**kwds))`` if flat=True.  If typed, then
@@ -259,15 +338,26 @@ class hashmap(keymap):
         algorithms.
         '''
         self.__type__ = kwds.pop('algorithm', None)
+        strategy = kwds.pop('ndarray_strategy', None)
+        if strategy not in _strategies:
+            raise ValueError("unknown ndarray_strategy '%s'" % strategy)
+        self._arrays = _strategies[strategy]
+        if kwds.pop('fast', False) and self.__type__ is None:
+            self.__type__ = 'blake2b' # stable across sessions, and fast
+            kwds.setdefault('digest_size', 16)
         keymap.__init__(self, typed=typed, flat=flat, sentinel=sentinel, **kwds)
         self.__stub__ = 'algorithm' #XXX: unnecessary if unified kwd
         return
     def encode(self, *args, **kwds):
         """use a flattened scheme for generating a key"""
-        return hash(keymap.encode(self, *args, **kwds), algorithm=self.__type__, **self._config)
+        key = keymap.encode(self, *args, **kwds)
+        if self._arrays: key = self._arrays(key)
+        return hash(key, algorithm=self.__type__, **self._config)
     def encrypt(self, *args, **kwds):
         """use a non-flat scheme for generating a key"""
-        return hash(keymap.encrypt(self, *args, **kwds), algorithm=self.__type__, **self._config)
+        key = keymap.encrypt(self, *args, **kwds)
+        if self._arrays: key = self._arrays(key)
+        return hash(key, algorithm=self.__type__, **self._config)
 
 class stringmap(keymap):
     """tool for converting a function's input signature to an unique key
@@ -279,6 +369,7 @@ class stringmap(keymap):
     signature from a string key that works in all cases, however this is
     possible for any object where __repr__ effectively mimics __init__.
     """ #XXX: encoding as first argument? easier to build, but less standard
+    __slots__ = ()
     def __init__(self, typed=False, flat=True, sentinel=NOSENTINEL, **kwds):
         '''initialize the key builder
 
@@ -286,6 +377,7 @@ class stringmap(keymap):
         flat: if True, flatten the key to a sequence; if False, use (args, kwds)
         sentinel: marker for separating args and kwds in flattened keys
         encoding: string name of string encoding [default: use python's str]
+        fast: if True, default to 'utf_8' encoded bytes [default: False]
 
         This keymap stores function args and kwds as (args, kwds) if flat=False,
         or a flattened ``(*args, zip(**kwds))`` if flat=True.  If typed, then
@@ -298,6 +390,8 @@ class stringmap(keymap):
         encodings.
         '''
         self.__type__ = kwds.pop('encoding', None)
+        if kwds.pop('fast', False) and self.__type__ is None:
+            self.__type__ = 'utf_8' # encode the repr directly as bytes
         keymap.__init__(self, typed=typed, flat=flat, sentinel=sentinel, **kwds)
         self.__stub__ = 'encoding' #XXX: unnecessary if unified kwd
         return
@@ -317,6 +411,7 @@ class picklemap(keymap):
     operation, where the original input signature can be recovered from the
     generated key.
     """ #XXX: serializer as first argument? easier to build, but less standard
+    __slots__ = ()
     def __init__(self, typed=False, flat=True, sentinel=NOSENTINEL, **kwds):
         '''initialize the key builder
 
@@ -334,12 +429,14 @@ class picklemap(keymap):
 
         Use kelpto.crypto.serializers() to get the names of available picklers.
         NOTE: the serializer kwd expects a <module> object, and not a <str>.
+        Additional kwds (e.g. protocol) are passed to the pickler's dumps.
         '''
-        kwds['byref'] = kwds.get('byref',True) #XXX: for dill
         self.__type__ = kwds.pop('serializer', None)
         #XXX: better not convert __type__ to string, so don't __import__ ?
         if not isinstance(self.__type__, (str, type(None))):
             self.__type__ = self.__type__.__name__
+        if self.__type__ == 'dill': # other picklers ignore all kwds if given
+            kwds['byref'] = kwds.get('byref',True)
         keymap.__init__(self, typed=typed, flat=flat, sentinel=sentinel, **kwds)
         self.__stub__ = 'serializer' #XXX: unnecessary if unified kwd
         return
@@ -12,24 +12,34 @@ decorators that provide rounding
 __all__ = ['deep_round', 'shallow_round', 'simple_round']
 #FIXME: these seem *slow*... and a bit convoluted.  Maybe rewrite as classes?
 unicode = str #PYTHON3
+# types that deep_round doesn't iterate into (nor round)
+_atomic = (str, unicode, BaseException, int, complex, type(None))
 
 def deep_round_factory(tol):
   """helper function for deep_round (a factory for deep_round functions)"""
   from klepto.tools import isiterable
+  try: # round float arrays in a single vectorized call
+    from numpy import ndarray, round as nround
+  except ImportError:
+    ndarray = ()
   def deep_round(*args, **kwds):
     argstype = type(args) 
     _args = list(args)
     _kwds = kwds.copy()
     for i,j in enumerate(args):
       if isinstance(j, float): _args[i] = round(j, tol) # don't round int
-      elif isinstance(j, (str, unicode, type(BaseException()))): continue
+      elif isinstance(j, _atomic): continue
+      elif isinstance(j, ndarray):
+        if j.dtype.kind == 'f': _args[i] = nround(j, tol)
       elif isinstance(j, dict): _args[i] = deep_round(**j)[1]
       elif isiterable(j): #XXX: fails on the above, so don't iterate them
         jtype = type(j)
         _args[i] = jtype(deep_round(*j)[0])
     for i,j in kwds.items():
       if isinstance(j, float): _kwds[i] = round(j, tol)
-      elif isinstance(j, (str, unicode, type(BaseException()))): continue
+      elif isinstance(j, _atomic): continue
+      elif isinstance(j, ndarray):
+        if j.dtype.kind == 'f': _kwds[i] = nround(j, tol)
       elif isinstance(j, dict): _kwds[i] = deep_round(**j)[1]
       elif isiterable(j): #XXX: fails on the above, so don't iterate them
         jtype = type(j)
@@ -144,9 +154,13 @@ class simple_round(object): #NOTE: only rounds floats, nothing else
 
 def shallow_round_factory(tol):
   """helper function for shallow_round (a factory for shallow_round functions)"""
+  from klepto.tools import isiterable
+  try: # round float arrays in a single vectorized call
+    from numpy import ndarray, round as nround
+  except ImportError:
+    ndarray = ()
   def around(iterable, tol):
     if isinstance(iterable, float): return round(iterable, tol)
-    from klepto.tools import isiterable
     if not isiterable(iterable): return iterable
     itype = type(iterable)
     _iterable = list(iterable)
@@ -158,11 +172,17 @@ def shallow_round_factory(tol):
     _args = list(args)
     _kwds = kwds.copy()
     for i,j in enumerate(args):
+      if isinstance(j, ndarray):
+        if j.dtype.kind == 'f': _args[i] = nround(j, tol)
+        continue
       try:
         jtype = type(j)
         _args[i] = jtype(around(j, tol))
       except: pass
     for i,j in kwds.items():
+      if isinstance(j, ndarray):
+        if j.dtype.kind == 'f': _kwds[i] = nround(j, tol)
+        continue
       try:
         jtype = type(j)
         _kwds[i] = jtype(around(j, tol))
@@ -89,6 +89,18 @@ def test_methods(d):
     else:
         pass
 
+def test_pool():
+    if __alchemy:
+        from klepto._archives import _pooled
+        from sqlalchemy.pool import NullPool, StaticPool
+        assert _pooled({}) == {'pool_use_lifo': True, 'pool_pre_ping': True}
+        for pool in (NullPool, StaticPool):
+            kwds = _pooled({'poolclass': pool})
+            assert kwds == {'poolclass': pool}
+            sqlalchemy.create_engine('sqlite://', **kwds).dispose()
+    else:
+        pass
+
 def test_new():
     if __alchemy:
         if __postgresql:
@@ -104,6 +116,7 @@ def test_new():
 if __name__ == '__main__':
 
     test_new()
+    test_pool()
     z = sqltable(cached=False)
     test_basic(z)
     test_alchemy(z)
@@ -6,63 +6,53 @@
 # License: 3-clause BSD.  The full license text is available at:
 #  - https://github.com/uqfoundation/klepto/blob/master/LICENSE
 
+import os
+import shutil
+import tempfile
+import pox
+from concurrent.futures import ProcessPoolExecutor
 from klepto.safe import lru_cache as memoized
-from random import choice, seed
+from random import choices, seed
 
 N = 30
 
-def _test_cache(cache, keymap=None, maxsize=50, rangelimit=10, tries=N):
+def _inputs(rangelimit=10, tries=N):
+    """draw a sequence of (x,y) inputs from the seeded random generator"""
+    domain = list(range(rangelimit))
+    domain += [float(i) for i in domain]
+    draws = choices(domain, k=2*tries)
+    return list(zip(draws[::2], draws[1::2]))
+
+
+def _test_cache(cache, keymap=None, inputs=(), maxsize=50):
 
     @memoized(maxsize=maxsize, cache=cache, keymap=keymap)
     def f(x, y):
         return 3*x+y
 
-    domain = list(range(rangelimit))
-    domain += [float(i) for i in domain]
-    for i in range(tries):
-        r = f(choice(domain), choice(domain))
+    for x, y in inputs:
+        r = f(x, y)
 
     f.dump()
     return f
 
 
+_files = frozenset(('memo.pkl', 'xxxx.pkl', 'memo.py', 'memo.pyc', 'memo.pyo',
+    'memo.pyd', 'xxxx.py', 'xxxx.pyc', 'xxxx.pyo', 'xxxx.pyd', 'memo.db'))
+_dirs = frozenset(('memoi', 'memoj', 'memom', 'memop', 'memoz', 'memo'))
+
 def _cleanup():
-    import os
-    import pox
-    try: os.remove('memo.pkl')
-    except: pass
-    try: os.remove('xxxx.pkl')
-    except: pass
-    try: os.remove('memo.py')
-    except: pass
-    try: os.remove('memo.pyc')
-    except: pass
-    try: os.remove('memo.pyo')
-    except: pass
-    try: os.remove('memo.pyd')
-    except: pass
-    try: os.remove('xxxx.py')
-    except: pass
-    try: os.remove('xxxx.pyc')
-    except: pass
-    try: os.remove('xxxx.pyo')
-    except: pass
-    try: os.remove('xxxx.pyd')
-    except: pass
-    try: os.remove('memo.db')
-    except: pass
-    try: pox.rmtree('memoi')
-    except: pass
-    try: pox.rmtree('memoj')
-    except: pass
-    try: pox.rmtree('memom')
-    except: pass
-    try: pox.rmtree('memop')
-    except: pass
-    try: pox.rmtree('memoz')
-    except: pass
-    try: pox.rmtree('memo')
-    except: pass
+    # read the directory once, instead of trying to remove each target
+    with os.scandir('.') as entries:
+        found = [entry for entry in entries if entry.name in _files \
+                                            or entry.name in _dirs]
+    for entry in found:
+        try:
+            if entry.name in _dirs and entry.is_dir():
+                pox.rmtree(entry.name)
+            elif entry.name in _files and not entry.is_dir():
+                os.unlink(entry.name)
+        except OSError: pass
     return
 
 
@@ -70,9 +60,8 @@ from klepto.archives import *
 from klepto.keymaps import keymap, hashmap, stringmap, picklemap
 from klepto.keymaps import SENTINEL, NOSENTINEL
 
-def test_combinations():
-    seed(1234) # random seed
-
+def _archives(root):
+    """build the archives under test, with files in the root directory"""
     #XXX: archive/cache should allow scalar and list, also dict (as new table) ?
     dicts = [
       {},
@@ -82,18 +71,19 @@ def test_combinations():
     ]
     init = dicts[0]
 
-    archives = [
+    path = lambda name: os.path.join(root, name)
+    return [
       null_archive(None,init),
       dict_archive(None,init),
-      file_archive(None,init,serialized=True),
-      file_archive(None,init,serialized=False),
-      file_archive('xxxx.pkl',init,serialized=True),
-      file_archive('xxxx.py',init,serialized=False),
-      dir_archive('memoi',init,serialized=False),
-      dir_archive('memop',init,serialized=True),
-      dir_archive('memoj',init,serialized=True,fast=True),
-      dir_archive('memoz',init,serialized=True,compression=1),
-      dir_archive('memom',init,serialized=True,memmode='r+'),
+      file_archive(path('memo.pkl'),init,serialized=True),
+      file_archive(path('memo.py'),init,serialized=False),
+      file_archive(path('xxxx.pkl'),init,serialized=True),
+      file_archive(path('xxxx.py'),init,serialized=False),
+      dir_archive(path('memoi'),init,serialized=False),
+      dir_archive(path('memop'),init,serialized=True),
+      dir_archive(path('memoj'),init,serialized=True,fast=True),
+      dir_archive(path('memoz'),init,serialized=True,compression=1),
+      dir_archive(path('memom'),init,serialized=True,memmode='r+'),
      #sqltable_archive(None,init),
      #sqltable_archive('sqlite:///memo.db',init),
      #sqltable_archive('memo',init),
@@ -104,12 +94,15 @@ def test_combinations():
     #FIXME: even 'safe' archives throw Error when cache.load, cache.dump fails
     #       (often demonstrated in sqltable_archive, as barfs on tuple & dict)
 
+
+def _maps():
+    """build the keymaps under test"""
     #XXX: when running a single map, there should be 3 possible results:
     #     1) flat=False may produce unhashable keys: all misses
     #     2) typed=False doesn't distinguish float & int: more hits & loads
     #     3) typed=True distingushes float & int: less hits & loads
     #XXX: due to the seed, each of the 3 cases should yield the same results
-    maps = [
+    return [
       None,
       keymap(typed=False, flat=True, sentinel=NOSENTINEL),
       keymap(typed=False, flat=False, sentinel=NOSENTINEL),
@@ -147,15 +140,36 @@ def test_combinations():
     ]
     #XXX: should have option to serialize value (as well as key) ?
 
-    for mapper in maps:
-       #print (mapper)
-        func = [_test_cache(cache, mapper) for cache in archives]
-        _cleanup()
 
-        for f in func:
-           #print (f.info())
-            assert f.info().hit + f.info().miss + f.info().load == N
 
+def _test_mapper(index, inputs):
+    """run the inputs through all archives using the indexed keymap
+
+    Archives are built in a new temporary directory, so keymaps can be
+    tested in parallel processes without sharing any files."""
+    mapper = _maps()[index]
+    tmpdir = tempfile.mkdtemp()
+    try:
+        func = [_test_cache(cache, mapper, inputs) for cache in _archives(tmpdir)]
+        return [f.info()[:3] for f in func] # (hit, miss, load)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def test_combinations():
+    seed(1234) # random seed
+    # draw the inputs once, so all combinations see the same sequence
+    inputs = _inputs()
+
+    # each keymap is independent, so test them in parallel
+    indices = range(len(_maps()))
+    with ProcessPoolExecutor() as pool:
+        results = list(pool.map(_test_mapper, indices, [inputs]*len(indices)))
+
+    for infos in results:
+        for hit, miss, load in infos:
+           #print (hit, miss, load)
+            assert hit + miss + load == N
 
 if __name__ == '__main__':
     test_combinations()
@@ -21,6 +21,23 @@ def test_bigdata():
         assert h(x) == h(y) # equal because repr for large np arrays uses '...'
         assert p(x) != p(y)
         assert hp(x) != hp(y)
+
+        # equal because only the first and last 32 items are hashed
+        t = hashmap(algorithm='md5', ndarray_strategy='truncated-prefix')
+        assert t(x) == t(y)
+        assert t(x) != t(x+1)
+        assert t(x) != t(x.astype(float))
+
+        # not equal because all items are hashed
+        b = hashmap(algorithm='md5', ndarray_strategy='bytes')
+        assert b(x) != b(y)
+        assert b(x) == b(x.copy())
+
+        # datetimes and timedeltas are hashed by their bytes
+        d = np.arange('2000-01-01', '2000-03-01', dtype='datetime64[D]')
+        assert b(d) == b(d.copy())
+        assert b(d) != b(d + 1)
+        assert b(d - d[0]) != b(d - d[1])
     except ImportError:
         print("to test big data, install numpy")
 
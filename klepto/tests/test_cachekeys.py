@@ -9,6 +9,7 @@
 from klepto import inf_cache as memoized
 from klepto.archives import *
 from klepto.keymaps import picklemap
+from collections import Counter
 
 try:
     import ___________ #XXX: enable test w/o numpy.arrays
@@ -68,7 +69,7 @@ def runme(arxiv, expected=None):
    #print(info)
 
     # check keys are identical in cache and archive
-    assert sorted(ck) == sorted(rk)
+    assert Counter(ck) == Counter(rk) # in any order, without sorting
 
     xx = len(ck) or max(info.hit, info.miss, info.load)
 
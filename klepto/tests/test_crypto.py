@@ -7,7 +7,6 @@
 #  - https://github.com/uqfoundation/klepto/blob/master/LICENSE
 
 from klepto.crypto import *
-from klepto.tools import _b
 from klepto.keymaps import *
 
 
@@ -20,10 +19,12 @@ def test_encoding():
     assert pickle(x) == string(x, 'repr')
     assert string(x) == '[1, 2, 3, \'4\', "\'5\'", <built-in function min>]'
     assert string(x, encoding='repr') == '[1, 2, 3, \'4\', "\'5\'", <built-in function min>]'
-    assert string(x, encoding='utf_8') == _b('[1, 2, 3, \'4\', "\'5\'", <built-in function min>]')
+    assert string(x, encoding='utf_8') == b'[1, 2, 3, \'4\', "\'5\'", <built-in function min>]'
+    assert string(x, encoding='ascii') == string(x)
+    assert string(u'\xe9', encoding='ascii') == "'\\xe9'"
     # some encodings 'missing' from klepto in python 3.x (due to bytes madness)
     if 'unicode' in encodings():
-        assert string(x, encoding='unicode') == unicode('[1, 2, 3, \'4\', "\'5\'", <built-in function min>]')
+        assert string(x, encoding='unicode') == str('[1, 2, 3, \'4\', "\'5\'", <built-in function min>]')
     if 'zlib_codec' in encodings():
         assert string(x, encoding='zlib_codec') == 'x\x9c\x8b6\xd4Q0\xd2Q0\xd6QP7Q\xd7QPR7UW\xd2Q\xb0I*\xcd\xcc)\xd1\xcd\xccSH+\xcdK.\xc9\xcc\xcfS\xc8\xcd\xcc\xb3\x8b\x05\x00\xf6(\x0c\x9c'
     if 'hex_codec' in encodings():
@@ -32,11 +33,13 @@ def test_encoding():
     s = stringmap()
     assert s(x) == '([1, 2, 3, \'4\', "\'5\'", <built-in function min>],)'
     s = stringmap(encoding='utf_8')
-    assert s(x) == _b('([1, 2, 3, \'4\', "\'5\'", <built-in function min>],)')
+    assert s(x) == b'([1, 2, 3, \'4\', "\'5\'", <built-in function min>],)'
+    s = stringmap(encoding='ascii')
+    assert s(1, 2) == '(1, 2)'
     # some encodings 'missing' from klepto in python 3.x (due to bytes madness)
     if 'unicode' in encodings():
         s = stringmap(encoding='unicode')
-        assert s(x) == unicode('([1, 2, 3, \'4\', "\'5\'", <built-in function min>],)')
+        assert s(x) == str('([1, 2, 3, \'4\', "\'5\'", <built-in function min>],)')
     if 'zlib_codec' in encodings():
         s = stringmap(encoding='zlib_codec')
         assert s(x) == 'x\x9c\xd3\x886\xd4Q0\xd2Q0\xd6QP7Q\xd7QPR7UW\xd2Q\xb0I*\xcd\xcc)\xd1\xcd\xccSH+\xcdK.\xc9\xcc\xcfS\xc8\xcd\xcc\xb3\x8b\xd5\xd1\x04\x00\x17\x99\r\x19'
@@ -45,5 +48,24 @@ def test_encoding():
         assert s(x) == '285b312c20322c20332c202734272c2022273527222c203c6275696c742d696e2066756e6374696f6e206d696e3e5d2c29'
 
 
+def test_pickle():
+    import dill
+    # basic types are pickled without dill, but must match dill exactly
+    x = ((1, 2.0, '3', b'4', None, True), {'a': [1, (2,)], 'b': {}})
+    for kwds in ({}, {'protocol': 2}, {'protocol': -1}, {'byref': True}):
+        assert pickle(x, serializer='dill', **kwds) == dill.dumps(x, **kwds)
+    x = [1,2,3,'4',"'5'", min]
+    assert pickle(x, serializer='dill') == dill.dumps(x)
+    # the pooled pickler doesn't keep the last object alive
+    import weakref, gc
+    class Big(object): pass
+    y = Big()
+    ref = weakref.ref(y)
+    assert pickle(y, serializer='dill') == dill.dumps(y)
+    del y; gc.collect()
+    assert ref() is None
+
+
 if __name__ == '__main__':
     test_encoding()
+    test_pickle()
@@ -58,6 +58,17 @@ def test_hdfdir_archive():
     d.dump()
     test_roundtrip(d)
 
+def test_frame_unchanged():
+    d = kl.archives.dict_archive('foo', dict(a=1,b=2,c=3), cached=True)
+    try:
+        frame = d.to_frame()
+    except ValueError:
+        return
+    name = frame.columns.name
+    d_ = kl.archives.null_archive.from_frame(frame)
+    assert d_.__type__ == kl.archives.null_archive
+    assert frame.columns.name == name
+
 def _cleanup():
     import os
     import pox
@@ -79,6 +90,7 @@ if __name__ == '__main__':
     test_file_archive()
     test_sql_archive()
     test_sqltable_archive()
+    test_frame_unchanged()
     try:
         test_hdf_archvie()
         test_hdfdir_archive()
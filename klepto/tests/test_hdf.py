@@ -6,21 +6,35 @@
 # License: 3-clause BSD.  The full license text is available at:
 #  - https://github.com/uqfoundation/klepto/blob/master/LICENSE
 
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from klepto.safe import lru_cache as memoized
-from random import choice, seed
+from random import choices, seed
+try:
+    import h5py
+except ImportError:
+    h5py = None
 
 N = 100
 
-def _test_cache(cache, keymap=None, maxsize=50, rangelimit=10, tries=N):
+def _inputs(rangelimit=10, tries=N):
+    """draw a sequence of (x,y) inputs from the seeded random generator"""
+    domain = list(range(rangelimit))
+    domain += [float(i) for i in domain]
+    draws = choices(domain, k=2*tries)
+    return list(zip(draws[::2], draws[1::2]))
+
+
+def _test_cache(cache, keymap=None, inputs=(), maxsize=50):
 
     @memoized(maxsize=maxsize, cache=cache, keymap=keymap)
     def f(x, y):
         return 3*x+y
 
-    domain = list(range(rangelimit))
-    domain += [float(i) for i in domain]
-    for i in range(tries):
-        r = f(choice(domain), choice(domain))
+    for x, y in inputs:
+        r = f(x, y)
 
     f.dump()
     return f
@@ -52,9 +66,8 @@ from klepto.archives import *
 from klepto.keymaps import keymap, hashmap, stringmap, picklemap
 from klepto.keymaps import SENTINEL, NOSENTINEL
 
-def test_combinations():
-    seed(1234) # random seed
-
+def _archives(root):
+    """build the archives under test, with files in the root directory"""
     #XXX: archive/cache should allow scalar and list, also dict (as new table) ?
     dicts = [
       {},
@@ -64,20 +77,26 @@ def test_combinations():
     ]
     init = dicts[0]
 
+    path = lambda name: os.path.join(root, name)
     archives = [
-      hdf_archive('memo.hdf5',init,serialized=True,meta=False),
-      hdf_archive('memo.h5',init,serialized=False,meta=False),
-      hdf_archive('xxxx.hdf5',init,serialized=True,meta=True),
-      hdf_archive('xxxx.h5',init,serialized=False,meta=True),
-      hdfdir_archive('memoq',init,serialized=False,meta=False),
-      hdfdir_archive('memor',init,serialized=True,meta=False),
-      hdfdir_archive('memos',init,serialized=False,meta=True),
-      hdfdir_archive('memot',init,serialized=True,meta=True),
+      hdf_archive(path('memo.hdf5'),init,serialized=True,meta=False),
+      hdf_archive(path('memo.h5'),init,serialized=False,meta=False),
+      hdf_archive(path('xxxx.hdf5'),init,serialized=True,meta=True),
+      hdf_archive(path('xxxx.h5'),init,serialized=False,meta=True),
+      hdfdir_archive(path('memoq'),init,serialized=False,meta=False),
+      hdfdir_archive(path('memor'),init,serialized=True,meta=False),
+      hdfdir_archive(path('memos'),init,serialized=False,meta=True),
+      hdfdir_archive(path('memot'),init,serialized=True,meta=True),
     ]
     if tuple(int(i) for i in h5py.__version__.split('.',2)) < (3,0,0):
       #FIXME: hdfdir_archive fails with serialized=False in python 3.x
       archives = archives[:4] + archives[5::2]
-    maps = [
+    return archives
+
+
+def _maps():
+    """build the keymaps under test"""
+    return [
       None,
       keymap(typed=False, flat=True, sentinel=NOSENTINEL),
       keymap(typed=False, flat=False, sentinel=NOSENTINEL),
@@ -96,19 +115,85 @@ def test_combinations():
       picklemap(typed=True, flat=False, sentinel=NOSENTINEL),
     ]
 
-    for mapper in maps:
-       #print (mapper)
-        func = [_test_cache(cache, mapper) for cache in archives]
+
+def _test_mapper(index, inputs):
+    """run the inputs through all archives using the indexed keymap
+
+    Archives are built in a new temporary directory, so keymaps can be
+    tested in parallel processes without sharing any files."""
+    mapper = _maps()[index]
+    tmpdir = tempfile.mkdtemp()
+    try:
+        func = [_test_cache(cache, mapper, inputs) for cache in _archives(tmpdir)]
+        return [f.info()[:3] for f in func] # (hit, miss, load)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def test_combinations():
+    if h5py is None: return
+    seed(1234) # random seed
+    # draw the inputs once, so all combinations see the same sequence
+    inputs = _inputs()
+
+    # each keymap is independent, so test them in parallel
+    indices = range(len(_maps()))
+    with ProcessPoolExecutor() as pool:
+        results = list(pool.map(_test_mapper, indices, [inputs]*len(indices)))
+
+    for infos in results:
+        for hit, miss, load in infos:
+           #print (hit, miss, load)
+            assert hit + miss + load == N
+
+
+def test_chunks():
+    if h5py is None: return
+    import numpy as np
+    x = np.arange(1e6).reshape(1000,1000)
+    try:
+        d = hdf_archive('memo.h5', serialized=False, cached=False)
+        d['x'] = x
+        d['y'] = 1.5
+        assert (d['x'] == x).all()
+        assert d['y'] == 1.5
+        e = hdf_archive('xxxx.h5', serialized=False, cached=False,
+                        compression='lzf')
+        e['x'] = x
+        assert (e['x'] == x).all()
+        with h5py.File('memo.h5', 'r') as f:
+            chunks = dict((k, f[k].chunks) for k in f)
+            filters = dict((k, f[k].compression) for k in f)
+        with h5py.File('xxxx.h5', 'r') as f:
+            filters_ = dict((k, f[k].compression) for k in f)
+    finally:
         _cleanup()
+    key = d._dumpkey('x').decode()
+    assert chunks[key] == (250, 500) # ~1 MB chunks
+    assert chunks[d._dumpkey('y').decode()] is None # scalars are contiguous
+    assert filters[key] is None # compression is opt-in
+    assert filters_[key] == 'lzf'
+
 
-        for f in func:
-           #print (f.info())
-            assert f.info().hit + f.info().miss + f.info().load == N
+def test_small_chunks():
+    if h5py is None: return
+    import numpy as np
+    x = np.arange(3.)
+    try:
+        d = hdf_archive('memo.h5', serialized=False, cached=False)
+        d['x'] = x
+        assert (d['x'] == x).all()
+        with h5py.File('memo.h5', 'r') as f:
+            chunks = f[d._dumpkey('x').decode()].chunks
+    finally:
+        _cleanup()
+    assert chunks is None # small arrays are contiguous
 
 
 if __name__ == '__main__':
-    try:
-        import h5py
-        test_combinations()
-    except ImportError:
+    if h5py is None:
         print("to test hdf, install h5py")
+    else:
+        test_combinations()
+        test_chunks()
+        test_small_chunks()
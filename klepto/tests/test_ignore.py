@@ -211,8 +211,21 @@ def test_special():
     assert _keygen(min, ['*'], 0) == ((), {}) if IS_PYPY else ((0,), {})
 
 
+def test_ignored_types():
+    def f(x, y): return x+y
+    # 1 == 1.0, but only an int is an index to ignore (in either order)
+    for ignored in (1, (1.0,), 1):
+        expected = {'x': 3, 'y': NULL if ignored == 1 else 4}
+        assert _keygen(f, ignored, 3, 4)[1] == expected
+    _keygen.__globals__['_ignored'].cache_clear()
+    for ignored in ((1.0,), 1, (1.0,)):
+        expected = {'x': 3, 'y': NULL if ignored == 1 else 4}
+        assert _keygen(f, ignored, 3, 4)[1] == expected
+
+
 if __name__ == '__main__':
     test_signature()
     test_keygen()
     test_keygen_foo()
     test_special()
+    test_ignored_types()
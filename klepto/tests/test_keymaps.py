@@ -30,6 +30,9 @@ def test_hashmap():
     assert encode(*args, **kwds) == hash((1, 2, 'a', 3, 'b', 4, type(1), type(2), type(3), type(4)))
     #encode = hashmap(typed=True, flat=False, sentinel=NOSENTINEL)
     #assert encode(*args, **kwds) == TypeError("unhashable type: 'dict'")
+    encode = hashmap(fast=True)
+    from hashlib import blake2b
+    assert encode(*args, **kwds) == blake2b(repr((1, 2, 'a', 3, 'b', 4)).encode(), digest_size=16).hexdigest()
 
 def test_stringmap():
     encode = stringmap(typed=False, flat=True, sentinel=NOSENTINEL)
@@ -42,6 +45,8 @@ def test_stringmap():
     assert encode(*args, **kwds) == str( (1, 2, 'a', 3, 'b', 4, type(1), type(2), type(3), type(4)) )
     encode = stringmap(typed=True, flat=False, sentinel=NOSENTINEL)
     assert eval(encode(*args, **kwds).replace(str((type(1), type(2))), "''")) == (args, kwds, '', '')
+    encode = stringmap(fast=True)
+    assert encode(*args, **kwds) == b"(1, 2, 'a', 3, 'b', 4)"
 
 def test_picklemap():
     encode = picklemap(typed=False, flat=True, serializer='dill')
@@ -66,10 +71,18 @@ def test_stub_decode():
     assert _stub_decoder(k)(k(key))[0] == key
     assert _stub_decoder(None)(k(key))[0] == key
 
+def test_attributes():
+    for cls in (keymap, hashmap, stringmap, picklemap):
+        k = cls()
+        k.note = 'x' # keymaps keep an instance __dict__
+        assert loads(dumps(k)).note == 'x'
+        assert loads(dumps(k))(*args, **kwds) == k(*args, **kwds)
+
 
 if __name__ == '__main__':
     test_keymap()
     test_hashmap()
     test_stringmap()
     test_picklemap()
+    test_attributes()
     #test_stub_decode()
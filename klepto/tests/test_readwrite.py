@@ -6,6 +6,7 @@
 # License: 3-clause BSD.  The full license text is available at:
 #  - https://github.com/uqfoundation/klepto/blob/master/LICENSE
 
+import tempfile
 from klepto.archives import dir_archive
 from pox import rmtree
 
@@ -48,19 +49,19 @@ def test_foo():
         # with _pickle
         d._fast = True
         d[key] = y
-        assert all(d[key] == y)
+        assert np.array_equal(d[key], y)
         d._rmdir(key)
 
         # with dill
         d._fast = False
         d[key] = y
-        assert all(d[key] == y)
+        assert np.array_equal(d[key], y)
         d._rmdir(key)
 
         # with import
         d._serialized = False
         d[key] = y
-        assert all(d[key] == y)
+        assert np.array_equal(d[key], y)
         d._rmdir(key)
         d._serialized = True
 
@@ -101,8 +102,8 @@ def check_numpy(archive):
     d['c'] = np.inf
     d['d'] = np.ptp
     d['e'] = t
-    assert all(d['a'] == x)
-    assert all(d['b'] == y)
+    assert np.array_equal(d['a'], x)
+    assert np.array_equal(d['b'], y)
     assert d['c'] == np.inf
     assert d['d'](x) == np.ptp(x)
     assert d['e'] == t
@@ -112,33 +113,109 @@ def check_numpy(archive):
 # FIXME: add tests for non-string keys (e.g. d[1234] = 'hello')
 
 def test_archive():
-    # try some of the different __init__
-    archive = dir_archive(cached=False)
+    # try some of the different __init__, each in a new temporary directory
+    for kwds in ({}, {'fast':True}, {'compression':3}, {'memmode':'r+'}):
+        root = tempfile.mkdtemp()
+        archive = dir_archive(root, cached=False, **kwds)
+        check_basic(archive)
+        check_numpy(archive)
+        rmtree(root, ignore_errors=True)
+
+    root = tempfile.mkdtemp()
+    archive = dir_archive(root, cached=False, serialized=False)
     check_basic(archive)
-    check_numpy(archive)
-    #rmtree('memo')
+    #check_numpy(archive) #FIXME: see issue #53 
+    rmtree(root, ignore_errors=True)
+
+
+def test_cache_size():
+    root = tempfile.mkdtemp()
+    archive = dir_archive(root, cached=True, cache_size=3)
+    for i in range(5):
+        archive[i] = i**2
+    assert len(archive) == 3
+    assert sorted(archive.keys()) == [2,3,4]
+    assert sorted(archive.archive.keys()) == [0,1]
+    archive[2] # mark 2 as most-recently-used
+    archive[5] = 25
+    assert sorted(archive.keys()) == [2,4,5]
+    archive.load(0)
+    assert sorted(archive.keys()) == [0,2,5]
+    assert archive[0] == 0
+    # a cache restores its size before it is refilled by unpickling
+    import pickle
+    copy = pickle.loads(pickle.dumps(archive))
+    assert sorted(copy.keys()) == [0,2,5]
+    assert copy.__maxsize__ == 3
+    assert repr(copy).endswith('cache_size=3)')
+    copy[6] = 36
+    assert sorted(copy.keys()) == [0,5,6]
+    try:
+        dir_archive(root, cached=False, cache_size=3)
+        raise AssertionError('cache_size used without a cache')
+    except ValueError:
+        pass
+    rmtree(root, ignore_errors=True)
 
-    archive = dir_archive(cached=False,fast=True)
-    check_basic(archive)
-    check_numpy(archive)
-    #rmtree('memo')
 
-    archive = dir_archive(cached=False,compression=3)
-    check_basic(archive)
-    check_numpy(archive)
-    #rmtree('memo')
+def test_zfile():
+    try:
+        import numpy as np
+    except ImportError:
+        return
+    from klepto import _pickle
+    import os
+    root = tempfile.mkdtemp()
+    name = os.path.join(root, 'x.pkl')
+    x = np.arange(24.).reshape(4,6)
+    # cache_size=0 writes even small arrays to a compressed z-file
+    for y in (x, np.asfortranarray(x), x[:,::2], np.matrix(x)):
+        _pickle.dump(y, name, compress=3, cache_size=0)
+        z = _pickle.load(name)
+        assert type(z) is type(y)
+        assert np.array_equal(z, y)
+        assert z.flags.f_contiguous == y.flags.f_contiguous
+    rmtree(root, ignore_errors=True)
+
+
+class _Unpicklable(object):
+    def __reduce__(self):
+        raise RuntimeError('unpicklable')
+
+def test_update():
+    from klepto._archives import THREADED
+    root = tempfile.mkdtemp()
+    archive = dir_archive(root, cached=False)
+    archive.update((i, i**2) for i in range(THREADED+1)) # threaded
+    assert sorted(archive.keys()) == list(range(THREADED+1))
+    try: # a failed write is raised
+        archive.update((i, _Unpicklable()) for i in range(THREADED+1))
+        raise AssertionError('update did not raise')
+    except RuntimeError:
+        pass
+    rmtree(root, ignore_errors=True)
 
-    archive = dir_archive(cached=False,memmode='r+')
-    check_basic(archive)
-    check_numpy(archive)
-    #rmtree('memo')
 
-    archive = dir_archive(cached=False,serialized=False)
-    check_basic(archive)
-    #check_numpy(archive) #FIXME: see issue #53 
-    rmtree('memo')
+def test_optimize_pickle():
+    import os
+    from klepto.archives import file_archive
+    seed = dict(('k%s' % i, [float(i)]) for i in range(5000))
+    sizes = []
+    for optimize in (False, True):
+        root = tempfile.mkdtemp()
+        name = os.path.join(root, 'foo.pkl')
+        archive = file_archive(name, seed, cached=False,
+                               optimize_pickle=optimize)
+        assert archive.__asdict__() == seed
+        sizes.append(os.path.getsize(name))
+        rmtree(root, ignore_errors=True)
+    assert sizes[1] < sizes[0]
 
 
 if __name__ == '__main__':
     test_foo()
     test_archive()
+    test_cache_size()
+    test_zfile()
+    test_update()
+    test_optimize_pickle()
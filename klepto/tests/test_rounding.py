@@ -24,6 +24,14 @@ def test_deep_round():
     result = add([2.54, 'x'],[5.47, [8.99, 'y']])
     assert result == [2.5, 'x', 5.5, [9.0, 'y']]
 
+    try: # rounds each float in an array, regardless of depth
+        import numpy as np
+        result = add([np.array([2.54, 5.47])], [np.array([1, 2])])
+        assert result[0].tolist() == [2.5, 5.5]
+        assert result[1].tolist() == [1, 2]
+    except ImportError:
+        pass
+
 def test_simple_round():
     @simple_round(tol=1)
     def add(x,y):
@@ -56,6 +64,21 @@ def test_shallow_round():
     result = add([2.54, 'x'],[5.47, [8.99, 'y']])
     assert result == [2.5, 'x', 5.5, [8.9900000000000002, 'y']]
 
+    # long sequences round the same as short ones
+    @shallow_round(tol=2)
+    def same(x):
+        return x
+
+    assert same([2.675]*63) == [2.67]*63
+    assert same([2.675]*64) == [2.67]*64
+
+    try: # rounds each float in an array
+        import numpy as np
+        result = add(np.array([2.54, 5.47]), np.array([1, 2]))
+        assert result.tolist() == [3.5, 7.5]
+    except ImportError:
+        pass
+
 
 # rounding integrated with key generation
 from klepto import keygen, NULL
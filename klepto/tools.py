@@ -13,24 +13,28 @@ Main functions exported are::
 
 """
 
-try:
-    import ctypes
-    # if using `pypy`, pythonapi is not found
-    IS_PYPY = not hasattr(ctypes, 'pythonapi')
-except ImportError:
-    IS_PYPY = False
+import sys
+# check the implementation directly, rather than importing ctypes
+IS_PYPY = sys.implementation.name == 'pypy'
 
 from collections import namedtuple
+#NOTE: kept a tuple (like functools' CacheInfo), so it compares and unpacks
 CacheInfo = namedtuple("CacheInfo", ['hit','miss','load','maxsize','size'])
 
 __all__ = ['isiterable']
 
+# common types, that can be checked without calling iter
+_iterables = (str, bytes, bytearray, list, tuple, dict, set, frozenset, range)
+_noniterables = (int, float, complex, type(None))
+
 def isiterable(x):
     """check if an object is iterable"""
    #try:
    #    from collections import Iterable
    #    return isinstance(x, Iterable)
    #except ImportError:
+    if isinstance(x, _iterables): return True
+    if isinstance(x, _noniterables): return False
     try:
         iter(x)
         return True
@@ -85,17 +85,17 @@ class BinaryDistribution(Distribution):
         return True
 
 # define dependencies
-sysversion = sys.version_info[:3]
 dill_version = 'dill>=0.3.9'
 pox_version = 'pox>=0.3.5'
 jsonpickle_version = 'jsonpickle>=0.9.6'
 cloudpickle_version = 'cloudpickle>=0.5.2'
+xxhash_version = 'xxhash>=1.0.0'
 sqlalchemy_version = 'sqlalchemy>=1.4.0'
 h5py_version = 'h5py>=2.8.0'
 pandas_version = 'pandas>=0.17.0'
 # add dependencies
 depend = [pox_version, dill_version]
-extras = {'archives': [h5py_version, sqlalchemy_version, pandas_version], 'crypto': [jsonpickle_version, cloudpickle_version]}
+extras = {'archives': [h5py_version, sqlalchemy_version, pandas_version], 'crypto': [jsonpickle_version, cloudpickle_version, xxhash_version]}
 # update setup kwds
 if has_setuptools:
     setup_kwds.update(
@@ -108,22 +108,18 @@ if has_setuptools:
 # call setup
 setup(**setup_kwds)
 
-# if dependencies are missing, print a warning
-try:
-    import dill
-    import pox
-    #import jsonpickle
-    #import cloudpickle
-    #import sqlalchemy
-    #import h5py
-    #import pandas
-except ImportError:
+# if dependencies are missing, print a warning (find, but don't import, them)
+from importlib.util import find_spec
+required = ('dill', 'pox') #, 'jsonpickle', 'cloudpickle', 'xxhash',
+                          #  'sqlalchemy', 'h5py', 'pandas')
+if any(find_spec(name) is None for name in required):
     print ("\n***********************************************************")
     print ("WARNING: One of the following dependencies is unresolved:")
     print ("    %s" % dill_version)
     print ("    %s" % pox_version)
     print ("    %s (optional)" % jsonpickle_version)
     print ("    %s (optional)" % cloudpickle_version)
+    print ("    %s (optional)" % xxhash_version)
     print ("    %s (optional)" % sqlalchemy_version)
     print ("    %s (optional)" % h5py_version)
     print ("    %s (optional)" % pandas_version)
@@ -76,10 +76,17 @@ def write_info_file(dirpath, modulename, **info):
     version = info.get('version', None)
     author = info.get('author', None)
     license = info.get('license', None)
+    content = header
+    if doc is not None: content += "'''%s'''\n\n" % doc
+    if version is not None: content += "__version__ = %r\n" % version
+    if author is not None: content += "__author__ = %r\n\n" % author
+    if license is not None: content += "__license__ = '''\n%s'''\n" % license
+    # don't rewrite an unchanged file (i.e. keep its mtime for build caches)
+    try:
+        with open(infofile) as fh:
+            if fh.read() == content: return
+    except OSError:
+        pass
     with open(infofile, 'w') as fh:
-        fh.write(header)
-        if doc is not None: fh.write("'''%s'''\n\n" % doc)
-        if version is not None: fh.write("__version__ = %r\n" % version)
-        if author is not None: fh.write("__author__ = %r\n\n" % author)
-        if license is not None: fh.write("__license__ = '''\n%s'''\n" % license)
+        fh.write(content)
     return